@@ -0,0 +1,7 @@
+import sys
+
+from chaoscrypt.cli import main
+
+# Same as `python -m chaoscrypt batch ...`
+if __name__ == '__main__':
+    main(['batch'] + sys.argv[1:])
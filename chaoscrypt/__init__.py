@@ -0,0 +1,21 @@
+"""
+Chaotic image encryption: the Hénon XOR scheme and the logistic map + DES scheme.
+
+Submodules are not imported here so that `import chaoscrypt` stays cheap:
+
+- henon: Hénon map trajectories (single key and batched)
+- keystream: keystream engines, seed derivation, seekable and parallel keystreams
+- imaging: images from paths, file objects, bytes or arrays to arrays and back without intermediate copies
+- xor: Hénon XOR encryption/decryption of images
+- streaming: strip-by-strip encryption of very large images
+- logistic: logistic map and chaotic permutation
+- ciphers: cipher backends (DES, AES-CTR, AES-GCM) and the chunked, multi-threaded cipher stage
+- container: self-describing DES file format with a channel and chunk index
+- des: chaotic DES encryption/decryption of images
+- metrics: NPCR/UACI/entropy and histograms (matplotlib is loaded on first plot)
+- batch: batch processing with a resumable manifest
+- bench: per-stage benchmark suite on synthetic images, JSON results and regression comparison
+- instrument: opt-in stage timers, byte counters and memory peaks with JSON/Prometheus export; loop progress hooks
+- ui: Tk interfaces (tkinter is loaded only here)
+- cli: `python -m chaoscrypt`
+"""
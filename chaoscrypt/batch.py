@@ -0,0 +1,161 @@
+import os
+import sys
+import glob
+import json
+import time
+from pathlib import Path
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.tif', '.tiff')
+
+def output_name(input_path, scheme, action, root='.'):
+    """
+    Output path relative to the output directory: the input's path relative to root (inputs keep their
+    subdirectory) with its full file name, so x.png and x.jpg do not share an output. DES ciphertext gets
+    .bin appended, which decryption drops again; every other result is a PNG and gets .png appended unless
+    the name already ends with it (x.png -> x.png.bin -> x.png, x.jpg -> x.jpg.png).
+    """
+    name = os.path.relpath(input_path, root)
+    if (scheme, action) == ('des', 'encrypt'):
+        return name + '.bin'
+    if (scheme, action) == ('des', 'decrypt') and name.lower().endswith('.bin'):
+        name = name[:-len('.bin')]
+    return name if name.lower().endswith('.png') else name + '.png'
+
+def pattern_root(pattern):
+    """
+    Directory the inputs of a directory or glob pattern are named relative to: the directory itself,
+    or the leading part of the pattern before the first wildcard.
+    """
+    if os.path.isdir(pattern):
+        return pattern
+    parts = []
+    for part in Path(pattern).parts:
+        if any(c in part for c in '*?['):
+            break
+        parts.append(part)
+    else:
+        parts = parts[:-1]  # A plain file name
+    return str(Path(*parts)) if parts else '.'
+
+def output_paths(inputs, pattern, scheme, action, output_dir):
+    """
+    Map every input to its output path, raising ValueError when two inputs would write the same output.
+    """
+    root = pattern_root(pattern)
+    outputs = {path: os.path.join(output_dir, output_name(path, scheme, action, root)) for path in inputs}
+    sources = {}
+    for path, output_path in outputs.items():
+        sources.setdefault(os.path.normcase(os.path.normpath(output_path)), []).append(path)
+    collisions = [paths for paths in sources.values() if len(paths) > 1]
+    if collisions:
+        raise ValueError("Several inputs map to the same output: "
+                         + "; ".join(", ".join(paths) for paths in collisions))
+    return outputs
+
+def process_file(scheme, action, color, input_path, output_path, params):
+    """
+    Encrypt or decrypt a single file. Runs inside a worker process.
+    Returns the cache hit/miss counts of this file as well (0, 0 without a cache).
+    """
+    from .cache import KeystreamCache
+
+    start_time = time.perf_counter()
+    cache = KeystreamCache(params['cache_dir'], params['cache_bytes']) if params.get('cache_dir') else None
+    if scheme == 'henon':
+        from . import xor
+
+        key = (params['a'], params['b'], params['x0'], params['y0'], params['z0'])
+        mode = 'RGB' if color == 'rgb' else 'L'
+        if action == 'encrypt':
+            encrypted_image = xor.encrypt_image(input_path, *key, params['engine'], params['seed_mode'], mode=mode,
+                                                cache=cache)
+            xor.save_encrypted_image(encrypted_image, output_path)
+        else:
+            xor.decrypt_image(input_path, *key, mode=mode, cache=cache).save(output_path)
+    else:
+        from . import des
+
+        threads = params.get('threads', 1)
+        if action == 'encrypt':
+            encrypt = des.image_encryption_rgb if color == 'rgb' else des.image_encryption
+            encrypt(input_path, params['x0'], params['des_key'], output_path, cache,
+                    params.get('permutation', 'argsort'), threads, params.get('cipher', 'des-ecb'),
+                    params.get('container', False))
+        else:
+            decrypt = des.image_decryption_rgb if color == 'rgb' else des.image_decryption
+            decrypt(input_path, params['x0'], params['des_key'], output_path, cache, threads)
+    hits, misses = (cache.hits, cache.misses) if cache else (0, 0)
+    return input_path, output_path, os.path.getsize(input_path), time.perf_counter() - start_time, hits, misses
+
+def collect_inputs(pattern, scheme, action):
+    """
+    Expand a directory or glob pattern into a sorted list of input files.
+    """
+    if os.path.isdir(pattern):
+        extensions = ('.bin',) if (scheme, action) == ('des', 'decrypt') else IMAGE_EXTENSIONS
+        return sorted(str(p) for p in Path(pattern).iterdir() if p.suffix.lower() in extensions)
+    return sorted(glob.glob(pattern, recursive=True))
+
+def read_manifest(manifest_path):
+    """
+    Return the set of inputs already finished in an earlier (possibly interrupted) run.
+    """
+    done = set()
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # Last line may be cut short by an interruption
+                if os.path.exists(entry['output']):
+                    done.add(entry['input'])
+    return done
+
+def run_batch(scheme, action, color, pattern, output_dir, params, workers=None, manifest_path=None):
+    """
+    Process every matching file on a process pool, skipping files recorded in the manifest.
+    """
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    os.makedirs(output_dir, exist_ok=True)
+    manifest_path = manifest_path or os.path.join(output_dir, 'manifest.jsonl')
+    done = read_manifest(manifest_path)
+    all_inputs = collect_inputs(pattern, scheme, action)
+    outputs = output_paths(all_inputs, pattern, scheme, action, output_dir)
+    inputs = [path for path in all_inputs if path not in done]
+    for path in inputs:
+        os.makedirs(os.path.dirname(outputs[path]), exist_ok=True)
+    print(f"{len(inputs)} file(s) to process, {len(done)} already done according to {manifest_path}")
+
+    processed, processed_bytes, failures = 0, 0, 0
+    cache_hits, cache_misses = 0, 0
+    start_time = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as executor, open(manifest_path, 'a') as manifest:
+        futures = {
+            executor.submit(process_file, scheme, action, color, path, outputs[path], params): path
+            for path in inputs
+        }
+        for future in as_completed(futures):
+            try:
+                input_path, output_path, size, seconds, hits, misses = future.result()
+            except Exception as e:
+                failures += 1
+                print(f"FAILED {futures[future]}: {e}", file=sys.stderr)
+                continue
+
+            # One line per finished file so an interrupted run can resume from here
+            manifest.write(json.dumps({'input': input_path, 'output': output_path, 'bytes': size, 'seconds': seconds}) + '\n')
+            manifest.flush()
+
+            processed += 1
+            processed_bytes += size
+            cache_hits, cache_misses = cache_hits + hits, cache_misses + misses
+            elapsed = time.perf_counter() - start_time
+            print(f"[{processed}/{len(inputs)}] {input_path} | "
+                  f"{processed / elapsed:.2f} images/s | {processed_bytes / elapsed / 1e6:.2f} MB/s")
+
+    if params.get('cache_dir'):
+        print(f"Cache: {cache_hits} hit(s), {cache_misses} miss(es)")
+
+    return processed, failures
@@ -0,0 +1,214 @@
+import os
+import json
+import time
+import platform
+import tempfile
+import numpy as np
+
+# Square image sides of the full suite. The Hénon map and seed stages run in pure Python (about a minute per
+# 1024x1024 RGB image with the legacy seed), so the default run stops at 1024 and the larger sides are opt-in.
+BENCH_SIZES = (256, 512, 1024, 2048, 4096, 8192, 16384)
+DEFAULT_BENCH_SIZES = (256, 512, 1024)
+BENCH_COLORS = ('gray', 'rgb')
+BENCH_SCHEMES = ('henon', 'des')
+BENCH_FORMAT = 1
+
+# A stage is flagged by compare_results when it got this much slower, unless it is shorter than the noise floor
+REGRESSION_THRESHOLD = 1.10
+REGRESSION_MIN_SECONDS = 0.01
+
+HENON_KEY = (1.4, 0.3, 0.1, 0.2, 0.3)
+DES_KEY = b'12345678'
+LOGISTIC_X0 = 0.6
+
+def synthetic_image(side, color, seed=0):
+    """
+    Reproducible side x side test image: gradients plus noise, so PNG timings are closer to a photo
+    than pure noise (which PNG cannot compress) or a flat image (which it compresses to nothing).
+    """
+    rng = np.random.default_rng(seed)
+    ramp = np.arange(side, dtype=np.uint16) * 255 // max(side - 1, 1)
+    channels = 3 if color == 'rgb' else 1
+    image = np.empty((side, side, channels), dtype=np.uint8)
+    for channel in range(channels):
+        gradient = ramp[:, None] if channel % 2 else ramp[None, :]
+        image[:, :, channel] = (gradient + rng.integers(0, 32, (side, side), dtype=np.uint16)) % 256
+    return image[:, :, 0] if channels == 1 else image
+
+class StageTimer:
+    """
+    Seconds spent in each named stage of one run; stages can be entered several times and add up.
+    """
+
+    def __init__(self):
+        self.seconds = {}
+
+    def add(self, stage, seconds):
+        self.seconds[stage] = self.seconds.get(stage, 0.0) + seconds
+
+    def call(self, stage, function, *args, **kwargs):
+        start = time.perf_counter()
+        result = function(*args, **kwargs)
+        self.add(stage, time.perf_counter() - start)
+        return result
+
+    def iterate(self, stage, iterable):
+        """
+        Yield from iterable, charging the time spent producing each item (not consuming it) to stage.
+        """
+        iterator = iter(iterable)
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                self.add(stage, time.perf_counter() - start)
+                return
+            self.add(stage, time.perf_counter() - start)
+            yield item
+
+def bench_io(timer, png, ciphertext, directory):
+    """
+    Stages shared by both schemes: decoding the source PNG, then writing and reading back the ciphertext file.
+    """
+    from .imaging import load_array
+
+    timer.call('png-decode', load_array, png)
+    path = os.path.join(directory, 'ciphertext')
+    with open(path, 'wb') as f:
+        timer.call('file-write', f.write, ciphertext)
+    with open(path, 'rb') as f:
+        timer.call('file-read', f.read)
+
+def bench_henon(image_array, png, directory, engine='legacy', seed_mode='string'):
+    """
+    One Hénon XOR encryption, stage by stage: Hénon map, seed derivation, keystream, XOR and PNG encoding.
+    The map runs interleaved with the seed hashing as in xor.encrypt_image; its share is timed separately.
+    """
+    from .henon import henon_map_3d_blocks
+    from .imaging import encode_image
+    from .keystream import KEYSTREAM_ENGINES, derive_seed, generate_keystream
+    from .xor import xor_keystream
+
+    timer = StageTimer()
+    iterations = image_array.size
+    seed_hash, _ = KEYSTREAM_ENGINES[engine]
+    blocks = timer.iterate('henon-map', henon_map_3d_blocks(*HENON_KEY, iterations))
+    start = time.perf_counter()
+    seed_hasher = derive_seed(blocks, seed_hash(), seed_mode)
+    timer.add('seed', time.perf_counter() - start - timer.seconds['henon-map'])
+
+    random_sequence = timer.call('keystream', generate_keystream, engine, seed_hasher, iterations)
+    encrypted = timer.call('xor', xor_keystream, image_array.copy(), random_sequence)
+    encrypted_png = timer.call('png-encode', encode_image, encrypted)
+    bench_io(timer, png, encrypted_png, directory)
+    return timer.seconds
+
+def bench_des(image_array, png, directory, cipher='des-ecb', permutation='argsort', threads=1):
+    """
+    One chaotic DES encryption and decryption, stage by stage: logistic map and argsort (or the whole
+    permutation for other modes), scramble, cipher, unscramble and PNG encoding of the result.
+    """
+    import io
+    from .ciphers import decrypt_buffer
+    from .des import map_encrypted, write_encrypted
+    from .imaging import encode_image
+    from .logistic import (
+        argsort_sequence, chaotic_permutations, logistic_map_batch, permute_channels, unpermute_channels,
+    )
+
+    timer = StageTimer()
+    size = image_array.shape[0] * image_array.shape[1]
+    channels = image_array.shape[2] if image_array.ndim == 3 else 1
+    x0s = [LOGISTIC_X0 + channel * 0.01 for channel in range(channels)]
+    if permutation == 'argsort':
+        sequences = timer.call('logistic-map', logistic_map_batch, size, x0s)
+        permutations = timer.call('argsort', lambda: [argsort_sequence(sequence) for sequence in sequences])
+        del sequences
+    else:
+        permutations = timer.call('permutation', chaotic_permutations, size, x0s, mode=permutation)
+
+    scrambled = timer.call('scramble', permute_channels, image_array.reshape(-1, channels), permutations, threads)
+    output = io.BytesIO()
+    timer.call('des-encrypt', write_encrypted, output, scrambled, image_array.shape, DES_KEY, permutation, cipher,
+               threads)
+    ciphertext = output.getvalue()
+    del scrambled, output
+
+    shape, _, _, nonce, views = map_encrypted(ciphertext, image_array.ndim)
+    planes = timer.call('des-decrypt', lambda: [decrypt_buffer(view, DES_KEY, cipher, nonce, channel * size, threads)
+                                                 for channel, view in enumerate(views)])
+    pixels = timer.call('unscramble', unpermute_channels, planes, permutations, threads=threads)
+    timer.call('png-encode', encode_image, pixels.reshape(shape))
+    bench_io(timer, png, ciphertext, directory)
+    return timer.seconds
+
+def run_suite(sizes=DEFAULT_BENCH_SIZES, colors=BENCH_COLORS, schemes=BENCH_SCHEMES, repeat=1, engine='legacy',
+              seed_mode='string', cipher='des-ecb', permutation='argsort', threads=1, log=None):
+    """
+    Run every (scheme, color, size) combination on synthetic images and return the results as a JSON-ready
+    dict. Each stage keeps its best time over `repeat` runs. log(row) is called after each combination.
+    """
+    from .imaging import encode_image
+
+    options = {'repeat': repeat, 'engine': engine, 'seed_mode': seed_mode, 'cipher': cipher,
+               'permutation': permutation, 'threads': threads}
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for side in sizes:
+            for color in colors:
+                image_array = synthetic_image(side, color)
+                png = encode_image(image_array)
+                for scheme in schemes:
+                    best = {}
+                    for _ in range(repeat):
+                        if scheme == 'henon':
+                            seconds = bench_henon(image_array, png, directory, engine, seed_mode)
+                        else:
+                            seconds = bench_des(image_array, png, directory, cipher, permutation, threads)
+                        for stage, value in seconds.items():
+                            best[stage] = min(value, best.get(stage, value))
+                    row = {'scheme': scheme, 'color': color, 'side': side, 'bytes': image_array.size,
+                           'stages': best}
+                    results.append(row)
+                    if log:
+                        log(row)
+    return {
+        'format': BENCH_FORMAT,
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'machine': {'platform': platform.platform(), 'python': platform.python_version(),
+                    'numpy': np.__version__, 'cpus': os.cpu_count()},
+        'options': options,
+        'results': results,
+    }
+
+def save_results(results, path):
+    with open(path, 'w') as f:
+        json.dump(results, f, indent=2)
+
+def load_results(path):
+    with open(path) as f:
+        results = json.load(f)
+    if results.get('format') != BENCH_FORMAT:
+        raise ValueError(f"Unsupported benchmark results format: {results.get('format')}")
+    return results
+
+def compare_results(baseline, current, threshold=REGRESSION_THRESHOLD, min_seconds=REGRESSION_MIN_SECONDS):
+    """
+    Match the stages of two result sets by (scheme, color, side, stage). Returns rows of
+    (scheme, color, side, stage, baseline seconds, current seconds, ratio, regressed); a stage regressed when it
+    is `threshold` times slower and took at least min_seconds in the current run.
+    """
+    previous = {(row['scheme'], row['color'], row['side']): row['stages'] for row in baseline['results']}
+    rows = []
+    for row in current['results']:
+        stages = previous.get((row['scheme'], row['color'], row['side']))
+        if stages is None:
+            continue
+        for stage, seconds in row['stages'].items():
+            if stage not in stages:
+                continue
+            ratio = seconds / stages[stage] if stages[stage] > 0 else float('inf')
+            regressed = ratio >= threshold and seconds >= min_seconds
+            rows.append((row['scheme'], row['color'], row['side'], stage, stages[stage], seconds, ratio, regressed))
+    return rows
@@ -0,0 +1,96 @@
+import os
+import json
+import hashlib
+import tempfile
+from pathlib import Path
+import numpy as np
+
+# Bump when a cached array would no longer match what the code computes
+CACHE_FORMAT = 1
+DEFAULT_CACHE_BYTES = 1 << 30
+
+class KeystreamCache:
+    """
+    On-disk cache of keystreams and permutations, one .npy file per entry.
+
+    Entries are keyed by (scheme, version, parameters, length) and read back as read-only memmaps,
+    so a hit costs a file open instead of recomputing the chaotic map. The least recently used
+    entries are deleted once the directory grows past max_bytes.
+
+    Cached keystreams are equivalent to the key they were derived from: keep the directory private.
+    """
+
+    def __init__(self, directory, max_bytes=DEFAULT_CACHE_BYTES):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.directory.mkdir(mode=0o700, parents=True, exist_ok=True)
+
+    def path(self, scheme, version, params, length):
+        """
+        File name of an entry: a hash of its key, so parameters do not appear on disk in clear.
+        """
+        key = json.dumps([CACHE_FORMAT, scheme, version, [float(p) for p in params], int(length)])
+        return self.directory / (hashlib.sha256(key.encode()).hexdigest() + '.npy')
+
+    def get(self, scheme, version, params, length):
+        """
+        Return the cached array as a read-only memmap, or None on a miss.
+        """
+        path = self.path(scheme, version, params, length)
+        try:
+            array = np.load(path, mmap_mode='r')
+            os.utime(path)  # The modification time is the LRU clock
+        except (FileNotFoundError, ValueError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return array
+
+    def put(self, scheme, version, params, length, array):
+        """
+        Store an array, then evict least recently used entries until the cache fits max_bytes.
+        """
+        path = self.path(scheme, version, params, length)
+        # Written under a temporary name and renamed, so concurrent readers never see a partial file
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            np.save(f, np.ascontiguousarray(array))
+        os.replace(temp_path, path)
+        self.evict()
+
+    def evict(self):
+        entries = []
+        for path in self.directory.glob('*.npy'):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue  # Removed by another process
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries, key=lambda entry: entry[0]):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+
+    def stats(self):
+        """
+        Hit/miss counts of this instance plus the current size of the cache directory.
+        """
+        sizes = [path.stat().st_size for path in self.directory.glob('*.npy')]
+        return {'hits': self.hits, 'misses': self.misses, 'entries': len(sizes), 'bytes': sum(sizes)}
+
+def cached(cache, scheme, version, params, length, compute):
+    """
+    compute() through the cache when one is given, otherwise compute() directly.
+    """
+    if cache is None:
+        return compute()
+    array = cache.get(scheme, version, params, length)
+    if array is None:
+        array = compute()
+        cache.put(scheme, version, params, length, array)
+    return array
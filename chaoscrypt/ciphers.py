@@ -0,0 +1,418 @@
+import os
+import time
+import hashlib
+import numpy as np
+from Crypto.Cipher import AES, DES
+from Crypto.Util.Padding import pad, unpad
+
+from .instrument import progress
+
+# Files encrypted with a backend other than the legacy DES-ECB end with the backend id, the nonce, their lengths
+# (1 byte each) and this marker, after the permutation trailer. Files without it are DES-ECB files.
+CIPHER_MAGIC = b'CCPH'
+
+# Ciphertext is encrypted and decrypted in chunks of about this many bytes (rounded to whole backend units)
+CIPHER_CHUNK_SIZE = 1 << 20
+
+# Plaintext bytes authenticated by one AES-GCM tag; smaller segments verify sooner but add 16 bytes each
+GCM_SEGMENT_SIZE = 1 << 16
+
+# A file nonce of this size is a random salt: the file is encrypted under a subkey derived from the key and the
+# salt (see file_subkey), so files under one key do not share keystream even when the cipher's nonce field is short
+FILE_SALT_SIZE = 16
+
+class CipherBackend:
+    """
+    A block cipher mode usable by the chunked, multi-threaded cipher stage.
+
+    Data is processed in units of `unit` plaintext bytes: chunks and thread segments are split on whole units,
+    and every unit is followed by tag_size bytes of ciphertext (AEAD tags). A padded backend PKCS#7-pads
+    the final partial unit instead. crypt() must give the same result for any split of the stream,
+    which is what makes the output independent of the thread count.
+    """
+
+    padded = False
+    tag_size = 0
+
+    def __init__(self, name, unit, nonce_size):
+        self.name = name
+        self.unit = unit
+        self.nonce_size = nonce_size
+
+    def key(self, key, nonce=b''):
+        """
+        Cipher key of a file encrypted under key with this file nonce.
+        """
+        return key
+
+    def ciphertext_size(self, size):
+        """
+        Ciphertext bytes of `size` plaintext bytes made of whole units (plus one last partial unit).
+        """
+        return size + self.tag_size * -(-size // self.unit)
+
+    def plaintext_size(self, size):
+        return size - self.tag_size * -(-size // (self.unit + self.tag_size))
+
+    def crypt(self, key, nonce, position, data, output, decrypt, end):
+        """
+        Encrypt or decrypt data, whose plaintext starts at byte `position` of a stream ending at byte `end`,
+        into output.
+        """
+        raise NotImplementedError
+
+class ECBBackend(CipherBackend):
+    """
+    DES-ECB with PKCS#7 padding, the format of the original scripts.
+    """
+
+    padded = True
+
+    def key(self, key, nonce=b''):
+        return key[:8]  # Ensure the key is 8 bytes
+
+    def crypt(self, key, nonce, position, data, output, decrypt, end):
+        cipher = DES.new(key, DES.MODE_ECB)
+        (cipher.decrypt if decrypt else cipher.encrypt)(data, output=output)
+
+class CTRBackend(CipherBackend):
+    """
+    Counter mode: the counter block holds the nonce and the block number, so any position can be seeked to.
+    The nonce takes half the counter block. With a salted file nonce (FILE_SALT_SIZE bytes), its first bytes fill
+    that half and the file is encrypted under a per-file subkey.
+    """
+
+    def __init__(self, name, module, nonce_size, key_size=None):
+        super().__init__(name, module.block_size, nonce_size)
+        self.module = module
+        self.key_size = key_size
+
+    def key(self, key, nonce=b''):
+        key = derive_key(key, self.key_size) if self.key_size else key[:8]
+        if len(nonce) == FILE_SALT_SIZE:
+            key = file_subkey(key, nonce, len(key), self.name)
+        return key
+
+    def crypt(self, key, nonce, position, data, output, decrypt, end):
+        block, skip = divmod(position, self.unit)
+        cipher = self.module.new(key, self.module.MODE_CTR, nonce=nonce[:self.unit // 2], initial_value=block)
+        if skip:
+            cipher.encrypt(bytes(skip))  # Move inside the first counter block
+        cipher.encrypt(data, output=output)  # Decryption is the same keystream XOR
+
+class GCMBackend(CipherBackend):
+    """
+    AES-GCM over independent segments of GCM_SEGMENT_SIZE bytes, each followed by its tag.
+    A segment's nonce holds 4 bytes of the file nonce, the segment position and a final-segment flag,
+    so segments cannot be reordered, moved between channels or cut off at the end without failing to verify.
+    Those 4 bytes alone would let the nonces of two files under one key collide after about 2^16 files, so new
+    files store a salt and every file is encrypted under its own subkey; files with the former 4-byte nonce still
+    decrypt under the key itself.
+    """
+
+    tag_size = 16
+
+    def __init__(self, name):
+        super().__init__(name, GCM_SEGMENT_SIZE, FILE_SALT_SIZE)
+
+    def key(self, key, nonce=b''):
+        key = derive_key(key, 32)
+        if len(nonce) == FILE_SALT_SIZE:
+            key = file_subkey(key, nonce, len(key), self.name)
+        return key
+
+    def crypt(self, key, nonce, position, data, output, decrypt, end):
+        data_unit = self.unit + self.tag_size if decrypt else self.unit
+        output_unit = self.unit if decrypt else self.unit + self.tag_size
+        for i, start in enumerate(range(0, len(data), data_unit)):
+            segment = data[start:start + data_unit]
+            segment_position = position + i * self.unit
+            size = len(segment) - self.tag_size if decrypt else len(segment)
+            final = segment_position + size == end
+            cipher = AES.new(key, AES.MODE_GCM,
+                             nonce=nonce[:4] + segment_position.to_bytes(7, 'big') + bytes([final]))
+            out = output[i * output_unit:i * output_unit + size + (0 if decrypt else self.tag_size)]
+            if decrypt:
+                cipher.decrypt(segment[:size], output=out)
+                cipher.verify(segment[size:])  # ValueError if the segment was modified
+            else:
+                cipher.encrypt(segment, output=out[:size])
+                out[size:] = cipher.digest()
+
+def derive_key(key, size):
+    """
+    AES key of `size` bytes: the key itself when it already has a valid AES length, otherwise its SHA-256.
+    """
+    if len(key) == size:
+        return key
+    return hashlib.sha256(b'chaoscrypt-aes-key' + key).digest()[:size]
+
+def file_subkey(key, salt, size, backend):
+    """
+    Per-file key of `size` bytes derived from the key and the file's random salt with HKDF-SHA256. Two files
+    under the same key share a keystream only if their 16-byte salts collide, instead of their short nonces.
+    """
+    from Crypto.Hash import SHA256
+    from Crypto.Protocol.KDF import HKDF
+
+    return HKDF(key, size, salt, SHA256, context=b'chaoscrypt-file-key/' + backend.encode())
+
+# Registry of cipher backends; the id is recorded in the file so that decryption selects the same backend
+CIPHER_BACKENDS = {
+    'des-ecb': ECBBackend('des-ecb', DES.block_size, 0),
+    # 4-byte block counter: up to 32 GiB per file. The DES block leaves only 4 bytes for the nonce, too few to
+    # keep random nonces apart across many files, so new files store a salt and use a per-file subkey;
+    # files with the former 4-byte nonce still decrypt under the key itself
+    'des-ctr': CTRBackend('des-ctr', DES, FILE_SALT_SIZE),
+    'aes-ctr': CTRBackend('aes-ctr', AES, 8, 32),
+    'aes-gcm': GCMBackend('aes-gcm'),
+}
+
+def new_nonce(backend):
+    """
+    Fresh random nonce for a file (empty for DES-ECB).
+    """
+    if backend not in CIPHER_BACKENDS:
+        raise ValueError(f"Unknown cipher backend: {backend}")
+    return os.urandom(CIPHER_BACKENDS[backend].nonce_size)
+
+def cipher_trailer(backend, nonce):
+    """
+    Bytes recording the cipher backend and nonce at the very end of a .bin file (empty for DES-ECB).
+    """
+    if backend == 'des-ecb':
+        return b''
+    return backend.encode() + nonce + bytes([len(backend), len(nonce)]) + CIPHER_MAGIC
+
+def split_cipher_trailer(data):
+    """
+    Strip the cipher trailer, returning the remaining file content, the cipher backend and the nonce.
+    """
+    if data[-len(CIPHER_MAGIC):] != CIPHER_MAGIC:
+        return data, 'des-ecb', b''
+    end = len(data) - len(CIPHER_MAGIC) - 2
+    name_size, nonce_size = data[end], data[end + 1]
+    start = end - nonce_size - name_size
+    backend = data[start:start + name_size].decode()
+    if backend not in CIPHER_BACKENDS:
+        raise ValueError(f"Unknown cipher backend: {backend}")
+    return data[:start], backend, data[end - nonce_size:end]
+
+def stream_ciphertext_size(backend, size):
+    """
+    Ciphertext bytes written by encrypt_stream for `size` plaintext bytes, padding included.
+    """
+    backend = CIPHER_BACKENDS[backend]
+    if backend.padded:
+        return size - size % backend.unit + backend.unit
+    return backend.ciphertext_size(size)
+
+def crypt_segments(backend, key, nonce, position, data, output, decrypt, end, executor=None, threads=1):
+    """
+    Encrypt or decrypt data into output as up to `threads` independent segments of whole units.
+    Every segment is processed on its own from its position, so the result is the same at any thread count;
+    with an executor the segments run in parallel (pycryptodome releases the GIL).
+    """
+    data_unit = backend.unit + (backend.tag_size if decrypt else 0)
+    output_unit = backend.unit + (0 if decrypt else backend.tag_size)
+    total_units = -(-len(data) // data_unit)
+    units = max(1, -(-total_units // threads))  # Units per segment
+
+    def crypt(i):
+        start = i * units
+        backend.crypt(key, nonce, position + start * backend.unit,
+                      data[start * data_unit:(start + units) * data_unit],
+                      output[start * output_unit:(start + units) * output_unit], decrypt, end)
+
+    segments = range(-(-len(data) // (units * data_unit)))
+    if executor is None or len(segments) < 2:
+        for i in segments:
+            crypt(i)
+    else:
+        list(executor.map(crypt, segments))
+
+def encrypt_stream(data, key, f, backend='des-ecb', nonce=b'', offset=0, threads=1, chunk_size=CIPHER_CHUNK_SIZE):
+    """
+    Encrypt data straight into the open file f, chunk by chunk. offset is the position of data in the file's
+    plaintext stream (channels of one file use disjoint ranges). With DES-ECB only the final chunk is padded and
+    the output equals f.write(des_encrypt(data, key)). Each chunk is split across `threads` threads and written
+    on a background thread while the next one is encrypted.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    backend = CIPHER_BACKENDS[backend]
+    key = backend.key(key, nonce)
+    data = memoryview(data).cast('B')
+    full = len(data) - len(data) % backend.unit if backend.padded else len(data)
+    chunk_size = max(1, chunk_size // backend.unit) * backend.unit
+    buffers = [memoryview(bytearray(backend.ciphertext_size(min(chunk_size, full)))) for _ in range(2)]
+
+    with ThreadPoolExecutor(max_workers=1) as writer, ThreadPoolExecutor(max_workers=threads) as executor:
+        pending = None
+        for i, start in enumerate(range(0, full, chunk_size)):
+            # Buffer i % 2 was last written two chunks ago, and that write has already finished
+            plaintext = data[start:min(start + chunk_size, full)]
+            chunk = buffers[i % 2][:backend.ciphertext_size(len(plaintext))]
+            crypt_segments(backend, key, nonce, offset + start, plaintext, chunk, False, offset + len(data),
+                           executor, threads)
+            if pending is not None:
+                pending.result()
+            pending = writer.submit(f.write, chunk)
+            progress('cipher.encrypt', start + len(plaintext), full)
+        if pending is not None:
+            pending.result()
+
+    if backend.padded:
+        f.write(DES.new(key, DES.MODE_ECB).encrypt(pad(bytes(data[full:]), backend.unit)))
+
+def read_chunks(f, length, chunk_size=CIPHER_CHUNK_SIZE):
+    """
+    Yield the next length bytes of the open file f as memoryviews of at most chunk_size bytes.
+    The following chunk is read on a background thread while the caller works on the current one.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    buffers = [bytearray(min(chunk_size, length)) for _ in range(2)]
+
+    def read(i, start):
+        chunk = memoryview(buffers[i % 2])[:min(chunk_size, length - start)]
+        if f.readinto(chunk) != len(chunk):
+            raise ValueError("Encrypted file is truncated.")
+        return chunk
+
+    with ThreadPoolExecutor(max_workers=1) as reader:
+        pending = reader.submit(read, 0, 0) if length else None
+        for i, start in enumerate(range(0, length, chunk_size)):
+            chunk = pending.result()
+            if start + chunk_size < length:
+                pending = reader.submit(read, i + 1, start + chunk_size)
+            yield chunk
+
+def decrypt_stream(f, length, key, backend='des-ecb', nonce=b'', offset=0, threads=1, chunk_size=CIPHER_CHUNK_SIZE,
+                   final=True):
+    """
+    Decrypt the next length bytes of the open file f, chunk by chunk, into a uint8 array.
+    With DES-ECB only the final block is unpadded and the result is a view of the decrypted buffer without
+    the padding. Each chunk is split across `threads` threads. final=False decrypts a piece from the middle
+    of a stream (whole units, no padding, no final AES-GCM segment).
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    backend = CIPHER_BACKENDS[backend]
+    key = backend.key(key, nonce)
+    if backend.padded and (length % backend.unit or not length):
+        raise ValueError("Ciphertext length is not a multiple of the DES block size.")
+    size = backend.plaintext_size(length)
+    decrypted = np.empty(size, dtype=np.uint8)
+    output = memoryview(decrypted)
+    data_unit = backend.unit + backend.tag_size
+
+    end = offset + size if final else -1  # -1: no segment of this piece ends the stream
+    position = 0
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        for chunk in read_chunks(f, length, max(1, chunk_size // data_unit) * data_unit):
+            plaintext = output[position:position + backend.plaintext_size(len(chunk))]
+            crypt_segments(backend, key, nonce, offset + position, chunk, plaintext, True, end, executor, threads)
+            position += len(plaintext)
+            progress('cipher.decrypt', position, size)
+
+    return strip_padding(backend, decrypted, final)
+
+def strip_padding(backend, decrypted, final=True):
+    """
+    View of the decrypted array without the DES-ECB padding of the final block.
+    """
+    if not backend.padded or not final:
+        return decrypted
+    # unpad checks the padding of the last block and tells how long the plaintext is
+    last_block = unpad(decrypted[-backend.unit:].tobytes(), backend.unit)
+    return decrypted[:len(decrypted) - backend.unit + len(last_block)]
+
+def decrypt_chunks(data, key, backend='des-ecb', nonce=b'', offset=0, threads=1, chunk_size=CIPHER_CHUNK_SIZE,
+                   final=True):
+    """
+    Decrypt the ciphertext buffer data (e.g. a view of a memory-mapped file) chunk by chunk, yielding
+    (plaintext offset, plaintext view) pairs. Chunks are passed to the cipher as views of data, and the
+    plaintext views share one chunk-sized buffer: each is only valid until the next chunk is requested.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    backend = CIPHER_BACKENDS[backend]
+    key = backend.key(key, nonce)
+    data = memoryview(data).cast('B')
+    if backend.padded and (len(data) % backend.unit or not data):
+        raise ValueError("Ciphertext length is not a multiple of the DES block size.")
+    data_unit = backend.unit + backend.tag_size
+    chunk_size = max(1, chunk_size // data_unit) * data_unit
+    end = offset + backend.plaintext_size(len(data)) if final else -1
+    buffer = np.empty(backend.plaintext_size(min(chunk_size, len(data))), dtype=np.uint8)
+
+    position = 0
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        for start in range(0, len(data), chunk_size):
+            chunk = data[start:start + chunk_size]
+            plaintext = buffer[:backend.plaintext_size(len(chunk))]
+            crypt_segments(backend, key, nonce, offset + position, chunk, memoryview(plaintext), True, end,
+                           executor, threads)
+            last = start + chunk_size >= len(data)
+            progress('cipher.decrypt', start + len(chunk), len(data))
+            yield position, strip_padding(backend, plaintext, final and last)
+            position += len(plaintext)
+
+def decrypt_buffer(data, key, backend='des-ecb', nonce=b'', offset=0, threads=1, out=None,
+                   chunk_size=CIPHER_CHUNK_SIZE):
+    """
+    Decrypt the whole ciphertext buffer data (e.g. a view of a memory-mapped file) into out, a uint8 array
+    of plaintext_size(len(data)) bytes allocated when None. Returns the plaintext view of out.
+    The buffer is decrypted chunk by chunk so that progress is reported (and a job can be cancelled) between chunks.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    backend = CIPHER_BACKENDS[backend]
+    key = backend.key(key, nonce)
+    data = memoryview(data).cast('B')
+    if backend.padded and (len(data) % backend.unit or not data):
+        raise ValueError("Ciphertext length is not a multiple of the DES block size.")
+    size = backend.plaintext_size(len(data))
+    decrypted = np.empty(size, dtype=np.uint8) if out is None else out[:size]
+    output = memoryview(decrypted)
+    data_unit = backend.unit + backend.tag_size
+    chunk_size = max(1, chunk_size // data_unit) * data_unit
+
+    position = 0
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        for start in range(0, len(data), chunk_size):
+            chunk = data[start:start + chunk_size]
+            plaintext = output[position:position + backend.plaintext_size(len(chunk))]
+            crypt_segments(backend, key, nonce, offset + position, chunk, plaintext, True, offset + size, executor,
+                           threads)
+            position += len(plaintext)
+            progress('cipher.decrypt', start + len(chunk), len(data))
+    return strip_padding(backend, decrypted)
+
+def benchmark_backends(sizes, threads=1, repeat=3):
+    """
+    Encrypt and decrypt random data of each size with every backend; returns rows of
+    (backend, size, encrypt MB/s, decrypt MB/s), best of `repeat` runs.
+    """
+    import io
+
+    rows = []
+    key = b'12345678'
+    for size in sizes:
+        data = np.random.default_rng(0).integers(0, 256, size, dtype=np.uint8)
+        for name in CIPHER_BACKENDS:
+            nonce = new_nonce(name)
+            encrypt_times, decrypt_times = [], []
+            for _ in range(repeat):
+                f = io.BytesIO()
+                start = time.perf_counter()
+                encrypt_stream(data, key, f, name, nonce, threads=threads)
+                encrypt_times.append(time.perf_counter() - start)
+                f.seek(0)
+                start = time.perf_counter()
+                decrypted = decrypt_stream(f, len(f.getvalue()), key, name, nonce, threads=threads)
+                decrypt_times.append(time.perf_counter() - start)
+                assert np.array_equal(decrypted, data)
+            rows.append((name, size, size / min(encrypt_times) / 1e6, size / min(decrypt_times) / 1e6))
+    return rows
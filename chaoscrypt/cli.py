@@ -0,0 +1,234 @@
+import os
+import sys
+import argparse
+
+# Only argparse and the keystream registry (for the --engine choices, it needs numpy) are imported at start-up;
+# PIL, pycryptodome, tkinter and matplotlib are imported by the command that needs them, so `--help` and worker
+# start-up stay cheap.
+
+def key_params(args):
+    """
+    Collect the key and engine options shared by every command into one dict.
+    """
+    return {
+        'a': args.a, 'b': args.b, 'y0': args.y0, 'z0': args.z0,
+        'x0': args.x0 if args.x0 is not None else (0.1 if args.scheme == 'henon' else 0.6),
+        'engine': args.engine, 'seed_mode': args.seed_mode, 'des_key': args.key.encode(),
+        'cache_dir': args.cache, 'cache_bytes': args.cache_size, 'permutation': args.permutation,
+        'threads': args.threads, 'cipher': args.cipher, 'container': args.container,
+    }
+
+def run_file(args):
+    """
+    Encrypt or decrypt one file, optionally strip by strip (Hénon only).
+    """
+    params = key_params(args)
+    if args.stream:
+        if args.scheme != 'henon':
+            sys.exit("--stream is only supported for the henon scheme")
+        from . import streaming
+
+        key = (params['a'], params['b'], params['x0'], params['y0'], params['z0'])
+        mode = 'RGB' if args.color == 'rgb' else 'L'
+        if args.action == 'encrypt':
+            streaming.encrypt_image_streaming(args.input, args.output, *key, args.engine or 'legacy', args.seed_mode,
+                                              args.memory_budget, mode)
+        else:
+            streaming.decrypt_image_streaming(args.input, args.output, *key, args.engine, None, args.memory_budget, mode)
+    elif args.scheme == 'henon':
+        from . import xor
+        from .cache import KeystreamCache
+
+        key = (params['a'], params['b'], params['x0'], params['y0'], params['z0'])
+        mode = 'RGB' if args.color == 'rgb' else 'L'
+        cache = KeystreamCache(args.cache, args.cache_size) if args.cache else None
+        if args.action == 'encrypt':
+            encrypted_image = xor.encrypt_image(args.input, *key, args.engine or 'legacy', args.seed_mode,
+                                                args.workers, mode, cache)
+            xor.save_encrypted_image(encrypted_image, args.output)
+        else:
+            xor.decrypt_image(args.input, *key, args.engine, bbox=args.bbox, workers=args.workers,
+                              mode=mode, cache=cache).save(args.output)
+        if cache:
+            print(f"Cache: {cache.hits} hit(s), {cache.misses} miss(es)")
+    else:
+        from .batch import process_file
+
+        *_, hits, misses = process_file('des', args.action, args.color, args.input, args.output, params)
+        if args.cache:
+            print(f"Cache: {hits} hit(s), {misses} miss(es)")
+
+def run_batch(args):
+    from .batch import run_batch
+
+    params = key_params(args)
+    params['engine'] = args.engine or 'legacy'
+    try:
+        processed, failures = run_batch(args.scheme, args.action, args.color, args.inputs, args.output_dir,
+                                        params, args.workers, args.manifest)
+    except ValueError as e:
+        sys.exit(str(e))
+    print(f"Done: {processed} processed, {failures} failed")
+    sys.exit(1 if failures else 0)
+
+def run_bench_ciphers(args):
+    from .ciphers import benchmark_backends
+
+    print(f"{'backend':<10}{'bytes':>12}{'encrypt MB/s':>15}{'decrypt MB/s':>15}")
+    for backend, size, encrypt_rate, decrypt_rate in benchmark_backends(args.sizes, args.threads, args.repeat):
+        print(f"{backend:<10}{size:>12}{encrypt_rate:>15.1f}{decrypt_rate:>15.1f}")
+
+def run_bench(args):
+    from .bench import BENCH_SIZES, run_suite, save_results
+
+    def log(row):
+        stages = ' '.join(f"{stage}={seconds:.3f}s" for stage, seconds in row['stages'].items())
+        print(f"{row['scheme']:<6}{row['color']:<5}{row['side']:>6}  {stages}", flush=True)
+
+    results = run_suite(BENCH_SIZES if args.full else args.sizes, args.colors, args.schemes, args.repeat,
+                        args.engine, args.seed_mode, args.cipher, args.permutation, args.threads, log)
+    if args.output:
+        save_results(results, args.output)
+        print(f"Results saved to {args.output}")
+
+def run_bench_compare(args):
+    from .bench import compare_results, load_results
+
+    baseline, current = load_results(args.baseline), load_results(args.current)
+    for field in ('options', 'machine'):
+        if baseline[field] != current[field]:
+            print(f"Warning: the runs differ in {field}: {baseline[field]} vs {current[field]}")
+    rows = compare_results(baseline, current, args.threshold, args.min_seconds)
+    print(f"{'scheme':<7}{'color':<6}{'side':>6}  {'stage':<14}{'baseline s':>11}{'current s':>11}{'ratio':>8}")
+    for scheme, color, side, stage, baseline, current, ratio, regressed in rows:
+        print(f"{scheme:<7}{color:<6}{side:>6}  {stage:<14}{baseline:>11.3f}{current:>11.3f}{ratio:>8.2f}"
+              + ("  REGRESSION" if regressed else ""))
+    regressions = sum(row[-1] for row in rows)
+    print(f"{regressions} regression(s) in {len(rows)} stage(s)")
+    sys.exit(1 if regressions else 0)
+
+def run_ui(args):
+    from . import ui
+
+    if args.scheme == 'henon':
+        ui.create_henon_ui()
+    else:
+        ui.create_des_ui()
+
+def add_metrics_arguments(command):
+    command.add_argument('--metrics', metavar='FILE',
+                         help="Write per-stage timings and byte counts here (JSON for .json, else Prometheus text)")
+    command.add_argument('--trace-memory', action='store_true',
+                         help="Also record the peak traced memory of every stage (slower; needs --metrics)")
+
+def positive_int(value):
+    """
+    argparse type of the thread and worker counts: an integer of at least 1.
+    """
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, not {number}")
+    return number
+
+def build_parser():
+    from .keystream import KEYSTREAM_ENGINES, SEED_MODES, SEEKABLE_ENGINE
+
+    # Options shared by the encrypt, decrypt and batch commands
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('--scheme', choices=('henon', 'des'), default='henon')
+    common.add_argument('--color', choices=('rgb', 'gray'), default='rgb')
+    common.add_argument('--a', type=float, default=1.4, help="Hénon map A")
+    common.add_argument('--b', type=float, default=0.3, help="Hénon map B")
+    common.add_argument('--x0', type=float, help="Initial X0 (Hénon default 0.1, logistic map default 0.6)")
+    common.add_argument('--y0', type=float, default=0.2)
+    common.add_argument('--z0', type=float, default=0.3)
+    common.add_argument('--engine', choices=(*KEYSTREAM_ENGINES, SEEKABLE_ENGINE),
+                        help="Hénon keystream engine (encrypt default: legacy, decrypt: read from the file)")
+    common.add_argument('--seed-mode', choices=SEED_MODES, default='string')
+    common.add_argument('--key', default='12345678', help="DES key (8 bytes)")
+    common.add_argument('--permutation', choices=('argsort', 'block-v1'), default='argsort',
+                        help="DES pixel permutation when encrypting (decrypt reads it from the file)")
+    common.add_argument('--cipher', choices=('des-ecb', 'des-ctr', 'aes-ctr', 'aes-gcm'), default='des-ecb',
+                        help="Cipher backend of the DES scheme when encrypting (decrypt reads it from the file)")
+    common.add_argument('--container', action='store_true',
+                        help="Write DES files in the self-describing container format (decrypt detects it)")
+    common.add_argument('--threads', type=positive_int, default=1, help="Threads for the DES channel scramble and cipher")
+    common.add_argument('--cache', metavar='DIR', help="Reuse keystreams/permutations from this on-disk cache")
+    common.add_argument('--cache-size', type=int, default=1 << 30, help="Cache budget in bytes (LRU eviction)")
+
+    parser = argparse.ArgumentParser(prog='python -m chaoscrypt',
+                                     description="Encrypt/decrypt images with the Hénon XOR or chaotic DES scheme.")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    for action in ('encrypt', 'decrypt'):
+        command = commands.add_parser(action, parents=[common], help=f"{action.capitalize()} a single file")
+        command.add_argument('input')
+        command.add_argument('output')
+        command.add_argument('--workers', type=positive_int, default=1, help="Processes for counter-mode keystreams")
+        command.add_argument('--stream', action='store_true', help="Process very large images strip by strip (Hénon)")
+        command.add_argument('--memory-budget', type=int, default=256 * 1024 * 1024, help="Streaming memory budget in bytes")
+        if action == 'decrypt':
+            command.add_argument('--bbox', type=int, nargs=4, metavar=('LEFT', 'TOP', 'RIGHT', 'BOTTOM'),
+                                 help="Only decrypt this region (Hénon)")
+        add_metrics_arguments(command)
+        command.set_defaults(action=action, handler=run_file)
+
+    command = commands.add_parser('batch', parents=[common], help="Encrypt/decrypt a directory or glob pattern")
+    command.add_argument('action', choices=('encrypt', 'decrypt'))
+    command.add_argument('inputs', help="Input directory or glob pattern")
+    command.add_argument('-o', '--output-dir', required=True)
+    command.add_argument('--workers', type=positive_int, default=os.cpu_count())
+    command.add_argument('--manifest', help="Manifest path (default: <output-dir>/manifest.jsonl)")
+    command.set_defaults(handler=run_batch)
+
+    # Default sizes: the two example images (RGBA) and a 4096x4096 grayscale image
+    command = commands.add_parser('bench-ciphers', help="Measure the throughput of every cipher backend")
+    command.add_argument('--sizes', type=int, nargs='+', default=[514 * 344 * 4, 816 * 816 * 4, 4096 * 4096],
+                         help="Plaintext sizes in bytes")
+    command.add_argument('--threads', type=positive_int, default=1)
+    command.add_argument('--repeat', type=int, default=3, help="Runs per measurement (the best one is kept)")
+    command.set_defaults(handler=run_bench_ciphers)
+
+    command = commands.add_parser('bench', help="Time every stage of both schemes on synthetic images")
+    command.add_argument('--sizes', type=int, nargs='+', default=[256, 512, 1024], help="Square image sides")
+    command.add_argument('--full', action='store_true', help="Run every side from 256 to 16384 (slow)")
+    command.add_argument('--colors', nargs='+', choices=('gray', 'rgb'), default=['gray', 'rgb'])
+    command.add_argument('--schemes', nargs='+', choices=('henon', 'des'), default=['henon', 'des'])
+    command.add_argument('--engine', choices=tuple(KEYSTREAM_ENGINES), default='legacy', help="Hénon keystream engine")
+    command.add_argument('--seed-mode', choices=SEED_MODES, default='string')
+    command.add_argument('--cipher', choices=('des-ecb', 'des-ctr', 'aes-ctr', 'aes-gcm'), default='des-ecb')
+    command.add_argument('--permutation', choices=('argsort', 'block-v1'), default='argsort')
+    command.add_argument('--threads', type=positive_int, default=1)
+    command.add_argument('--repeat', type=int, default=1,
+                         help="Runs per combination (the best time of each stage is kept)")
+    command.add_argument('-o', '--output', help="Save the results to this JSON file")
+    command.set_defaults(handler=run_bench)
+
+    command = commands.add_parser('bench-compare', help="Compare two bench results and flag slower stages")
+    command.add_argument('baseline')
+    command.add_argument('current')
+    command.add_argument('--threshold', type=float, default=1.10, help="Slowdown ratio flagged as a regression")
+    command.add_argument('--min-seconds', type=float, default=0.01,
+                         help="Stages shorter than this in the current run are never flagged")
+    command.set_defaults(handler=run_bench_compare)
+
+    command = commands.add_parser('ui', help="Open the Tk interface")
+    command.add_argument('scheme', choices=('henon', 'des'), nargs='?', default='henon')
+    add_metrics_arguments(command)
+    command.set_defaults(handler=run_ui)
+
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if not getattr(args, 'metrics', None):
+        args.handler(args)
+        return
+
+    from . import instrument
+
+    instrument.enable(args.trace_memory)
+    try:
+        args.handler(args)
+    finally:
+        instrument.write_metrics(args.metrics)
@@ -0,0 +1,139 @@
+import os
+import json
+
+from .ciphers import CIPHER_BACKENDS, CIPHER_CHUNK_SIZE, decrypt_stream, stream_ciphertext_size
+from .logistic import PERMUTATION_MODES
+
+# Layout of a container file:
+#   CONTAINER_MAGIC | version (2 bytes) | header length (4 bytes) | JSON header | payload
+# The header describes the image and the scheme and indexes every channel and chunk of the payload
+# (offsets relative to the payload start), so a reader can validate a file, seek to any channel or
+# chunk and process them in parallel without reading the payload first. All integers are big-endian.
+CONTAINER_MAGIC = b'CHAOSDES'
+CONTAINER_VERSION = 1
+CONTAINER_SCHEME = 'chaotic-des'
+
+def is_container(f):
+    """
+    Whether the open file f starts with CONTAINER_MAGIC; f is rewound to the start.
+    """
+    f.seek(0)
+    magic = f.read(len(CONTAINER_MAGIC))
+    f.seek(0)
+    return magic == CONTAINER_MAGIC
+
+def channel_index(plaintext_size, cipher, chunk_size=CIPHER_CHUNK_SIZE):
+    """
+    Chunks of one channel as [plaintext offset, ciphertext offset, ciphertext length] lists, relative to the
+    channel. The layout is the one written by encrypt_stream: whole backend units per chunk,
+    DES-ECB padding at the end of the last chunk.
+    """
+    backend = CIPHER_BACKENDS[cipher]
+    chunk_size = max(1, chunk_size // backend.unit) * backend.unit
+    chunks, ciphertext_offset = [], 0
+    for start in range(0, max(plaintext_size, 1), chunk_size):
+        size = min(chunk_size, plaintext_size - start)
+        last = start + chunk_size >= plaintext_size
+        if backend.padded and last:
+            length = size - size % backend.unit + backend.unit
+        else:
+            length = backend.ciphertext_size(size)
+        chunks.append([start, ciphertext_offset, length])
+        ciphertext_offset += length
+    return chunks
+
+def container_header(shape, permutation, cipher, nonce, chunk_size=CIPHER_CHUNK_SIZE):
+    """
+    Header of a container holding a uint8 image of the given shape, (H, W) or (H, W, C).
+    """
+    channels = shape[2] if len(shape) == 3 else 1
+    chunks = channel_index(shape[0] * shape[1], cipher, chunk_size)
+    channel_length = chunks[-1][1] + chunks[-1][2]
+    return {
+        'scheme': CONTAINER_SCHEME,
+        'shape': list(shape), 'dtype': 'uint8', 'channels': channels,
+        'permutation': permutation, 'cipher': cipher, 'nonce': nonce.hex(),
+        'chunk_size': chunk_size,
+        'channel_index': [{'offset': channel * channel_length, 'length': channel_length, 'chunks': chunks}
+                          for channel in range(channels)],
+    }
+
+def write_container_header(f, header):
+    data = json.dumps(header, separators=(',', ':')).encode()
+    f.write(CONTAINER_MAGIC + CONTAINER_VERSION.to_bytes(2, 'big') + len(data).to_bytes(4, 'big') + data)
+
+def read_container_header(f, ndim=None):
+    """
+    Read and validate the header of the open container file f, rejecting unknown versions, schemes,
+    cipher backends and permutation modes, (when given) an image with another number of dimensions
+    (2 grayscale, 3 color), a channel and chunk index that does not match the shape and cipher, and a payload
+    size that does not match the index. Nothing image-sized is trusted before these checks, so a forged shape
+    is rejected before any allocation. Adds the absolute 'payload_offset'; f is left at the payload start.
+    """
+    f.seek(0)
+    if f.read(len(CONTAINER_MAGIC)) != CONTAINER_MAGIC:
+        raise ValueError("Not a chaoscrypt container file.")
+    version = int.from_bytes(f.read(2), 'big')
+    if version != CONTAINER_VERSION:
+        raise ValueError(f"Unsupported container version: {version}")
+    header = json.loads(f.read(int.from_bytes(f.read(4), 'big')))
+    header['payload_offset'] = f.tell()
+
+    if header.get('scheme') != CONTAINER_SCHEME or header.get('dtype') != 'uint8':
+        raise ValueError(f"Unsupported container content: {header.get('scheme')}, {header.get('dtype')}")
+    if header['cipher'] not in CIPHER_BACKENDS:
+        raise ValueError(f"Unknown cipher backend: {header['cipher']}")
+    if header['permutation'] not in PERMUTATION_MODES:
+        raise ValueError(f"Unknown permutation mode: {header['permutation']}")
+    if ndim is not None and len(header['shape']) != ndim:
+        kinds = {2: 'grayscale', 3: 'color'}
+        raise ValueError(f"Expected a {kinds[ndim]} image, the file holds a {kinds[len(header['shape'])]} one.")
+    shape, channels, chunk_size = header['shape'], header['channels'], header['chunk_size']
+    if (len(shape) not in (2, 3) or not all(isinstance(n, int) and n > 0 for n in shape)
+            or channels != (shape[2] if len(shape) == 3 else 1)):
+        raise ValueError(f"Invalid image shape {shape} for {channels} channel(s).")
+    if not isinstance(chunk_size, int) or chunk_size <= 0:
+        raise ValueError(f"Invalid chunk size: {chunk_size}")
+
+    # O(1) checks first: channel count, channel lengths and the payload size bound the shape by the file size
+    size = shape[0] * shape[1]
+    index = header['channel_index']
+    channel_length = stream_ciphertext_size(header['cipher'], size)
+    if len(index) != channels or any(entry.get('length') != channel_length for entry in index):
+        raise ValueError("Container index does not match the image shape and cipher.")
+    if f.seek(0, os.SEEK_END) != header['payload_offset'] + channels * channel_length:
+        raise ValueError("Encrypted file is truncated or has trailing data.")
+    # Then the whole index must be the one written for this shape and cipher; its chunk count is checked
+    # before it is rebuilt, so the work stays proportional to the header already read
+    unit = CIPHER_BACKENDS[header['cipher']].unit
+    chunks = -(-size // (max(1, chunk_size // unit) * unit))
+    mismatch = any(len(entry.get('chunks', ())) != chunks for entry in index)
+    if mismatch or index != container_header(shape, header['permutation'], header['cipher'], b'',
+                                             chunk_size)['channel_index']:
+        raise ValueError("Container index does not match the image shape and cipher.")
+    f.seek(header['payload_offset'])
+    return header
+
+def read_channel(path, header, channel, key, threads=1):
+    """
+    Decrypt one channel of a container on its own file handle, so channels can be decrypted in parallel.
+    """
+    entry = header['channel_index'][channel]
+    plaintext_size = header['shape'][0] * header['shape'][1]
+    with open(path, 'rb') as f:
+        f.seek(header['payload_offset'] + entry['offset'])
+        return decrypt_stream(f, entry['length'], key, header['cipher'], bytes.fromhex(header['nonce']),
+                              channel * plaintext_size, threads, header['chunk_size'])
+
+def read_chunk(path, header, channel, chunk, key):
+    """
+    Decrypt a single chunk of one channel (still scrambled) by seeking to it through the index.
+    """
+    entry = header['channel_index'][channel]
+    start, offset, length = entry['chunks'][chunk]
+    plaintext_size = header['shape'][0] * header['shape'][1]
+    with open(path, 'rb') as f:
+        f.seek(header['payload_offset'] + entry['offset'] + offset)
+        return decrypt_stream(f, length, key, header['cipher'], bytes.fromhex(header['nonce']),
+                              channel * plaintext_size + start, chunk_size=header['chunk_size'],
+                              final=chunk == len(entry['chunks']) - 1)
@@ -0,0 +1,295 @@
+import io
+import os
+import mmap
+from contextlib import nullcontext
+import numpy as np
+from Crypto.Cipher import DES
+from Crypto.Util.Padding import pad, unpad
+
+from .ciphers import (
+    cipher_trailer, decrypt_buffer, decrypt_chunks, encrypt_stream, new_nonce, split_cipher_trailer,
+    stream_ciphertext_size,
+)
+from .container import container_header, is_container, read_container_header, write_container_header
+from .imaging import array_image, is_path, load_array, save_image
+from .instrument import stage
+from .logistic import (
+    PERMUTATION_MODES, chaotic_permutations, map_channels, permute, permute_channels, unpermute,
+)
+
+# Files scrambled with a mode other than the legacy argsort end with the mode name, its length (1 byte)
+# and this marker after the image shape. Files without it are legacy argsort files.
+PERMUTATION_MAGIC = b'CPRM'
+
+def des_encrypt(data, key):
+    """
+    Encrypt data using DES.
+    """
+    cipher = DES.new(key, DES.MODE_ECB)
+    return cipher.encrypt(pad(data, DES.block_size))
+
+def des_decrypt(data, key):
+    """
+    Decrypt data using DES.
+    """
+    cipher = DES.new(key, DES.MODE_ECB)
+    return unpad(cipher.decrypt(data), DES.block_size)
+
+def permutation_trailer(permutation):
+    """
+    Bytes recording the permutation mode at the end of a .bin file (empty for the legacy mode).
+    """
+    if permutation not in PERMUTATION_MODES:
+        raise ValueError(f"Unknown permutation mode: {permutation}")
+    if permutation == 'argsort':
+        return b''
+    return permutation.encode() + bytes([len(permutation)]) + PERMUTATION_MAGIC
+
+def split_permutation_trailer(data):
+    """
+    Strip the permutation trailer, returning the legacy file content and the permutation mode.
+    """
+    if data[-len(PERMUTATION_MAGIC):] != PERMUTATION_MAGIC:
+        return data, 'argsort'
+    end = len(data) - len(PERMUTATION_MAGIC) - 1
+    return data[:end - data[end]], data[end - data[end]:end].decode()
+
+def read_trailers(f, shape_size):
+    """
+    Read the shape, permutation and cipher trailers at the end of the open .bin file f without reading the
+    ciphertext. Returns the ciphertext length, the shape trailer bytes, the permutation mode, the cipher backend
+    and the nonce, with f rewound to the start.
+    """
+    size = f.seek(0, os.SEEK_END)
+    tail_size = min(size, shape_size + 1024)  # Longer than the longest possible trailers
+    f.seek(size - tail_size)
+    tail, cipher, nonce = split_cipher_trailer(f.read(tail_size))
+    tail, permutation = split_permutation_trailer(tail)
+    if len(tail) < shape_size:
+        raise ValueError("Encrypted file is truncated.")
+    f.seek(0)
+    return size - tail_size + len(tail) - shape_size, tail[-shape_size:], permutation, cipher, nonce
+
+def write_encrypted(output_file, planes, shape, des_key, permutation, cipher, threads=1, container=False):
+    """
+    Encrypt the scrambled channel planes into output_file: a container (header and index first),
+    or the legacy layout (ciphertext, then the shape, permutation and cipher trailers).
+    The channels share one plaintext stream of the backend, channel c starting at byte c * H * W.
+    output_file is a path or a writable binary file object (e.g. io.BytesIO), which is left open.
+    """
+    nonce = new_nonce(cipher)
+    with nullcontext(output_file) if hasattr(output_file, 'write') else open(output_file, 'wb') as f:
+        if container:
+            write_container_header(f, container_header(shape, permutation, cipher, nonce))
+        for channel, plane in enumerate(planes):
+            encrypt_stream(plane, des_key, f, cipher, nonce, channel * plane.size, threads)
+        if not container:
+            f.write(shape[0].to_bytes(4, 'big'))
+            f.write(shape[1].to_bytes(4, 'big'))
+            if len(shape) == 3:
+                f.write(shape[2].to_bytes(1, 'big'))
+            f.write(permutation_trailer(permutation))
+            f.write(cipher_trailer(cipher, nonce))
+
+def map_encrypted(input_file, ndim):
+    """
+    Locate the channels of a file written by write_encrypted (either layout) without reading or copying the
+    payload. input_file is a path or a binary file object, which are memory-mapped (file objects without a file
+    descriptor are read once), or the bytes of the file, which are used in place. ndim is 2 for grayscale files
+    and 3 for color ones.
+    Returns the shape, the permutation mode, the cipher backend, the nonce and one ciphertext view per channel.
+    """
+    if is_path(input_file):
+        with open(input_file, 'rb') as f:
+            return map_encrypted(f, ndim)
+    if isinstance(input_file, (bytes, bytearray, memoryview)):
+        f, data = io.BytesIO(input_file), memoryview(input_file).cast('B')
+    else:
+        f, data = input_file, None
+
+    if is_container(f):
+        header = read_container_header(f, ndim)
+        shape, permutation = tuple(header['shape']), header['permutation']
+        cipher, nonce = header['cipher'], bytes.fromhex(header['nonce'])
+        bounds = [(header['payload_offset'] + entry['offset'], entry['length']) for entry in header['channel_index']]
+    else:
+        # Legacy layout: the shape trailer is 8 bytes for grayscale files and 9 for color ones
+        length, shape_bytes, permutation, cipher, nonce = read_trailers(f, 4 * 2 + (ndim == 3))
+        shape = (int.from_bytes(shape_bytes[:4], 'big'), int.from_bytes(shape_bytes[4:8], 'big'))
+        shape += tuple(shape_bytes[8:])
+        channels = shape[2] if ndim == 3 else 1
+        # Checked before anything image-sized is allocated, a corrupt trailer could claim any shape
+        if length != channels * stream_ciphertext_size(cipher, shape[0] * shape[1]):
+            raise ValueError("Encrypted file is truncated or has trailing data.")
+        bounds = [(channel * (length // channels), length // channels) for channel in range(channels)]
+
+    if data is None:
+        try:
+            # The map stays valid after the file is closed, and is released with the last view
+            data = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+        except (AttributeError, OSError):
+            f.seek(0)
+            data = memoryview(f.read())
+    return shape, permutation, cipher, nonce, [data[start:start + length] for start, length in bounds]
+
+def check_channel_size(decrypted_size, shape):
+    # Make sure the data length matches the image dimensions
+    if decrypted_size != shape[0] * shape[1]:
+        raise ValueError("Decrypted data size does not match the expected image dimensions.")
+
+def decrypt_pixels(input_file, x0_chaos, des_key, ndim, cache=None, threads=1):
+    """
+    Decrypt a file written by write_encrypted (a path, a file object or bytes, see map_encrypted) into a new
+    (H, W) or (H, W, C) array, the only image-sized buffer of the pass: the file is memory-mapped (bytes are used
+    in place), its ciphertext is decrypted chunk by chunk from views of it, and every chunk is scattered straight
+    to its final pixel positions (through a channel plane for color images). With a cache, the inverse
+    permutations are gathered instead, which needs each whole scrambled channel in a plane. Channels run in
+    parallel when threads > 1, one plane per running channel.
+    """
+    shape, permutation, cipher, nonce, ciphertexts = map_encrypted(input_file, ndim)
+    size = shape[0] * shape[1]
+    channels = len(ciphertexts)
+    inverse = cache is not None
+    with stage('des.permutation', size * channels):
+        permutations = chaotic_permutations(size, [x0_chaos + channel * 0.01 for channel in range(channels)],
+                                            cache=cache, inverse=inverse, mode=permutation)
+    cipher_threads = max(1, threads // min(threads, channels))
+
+    def decrypt_channel(channel):
+        # A grayscale image has one contiguous column, which is scattered into directly
+        plane = pixels[:, 0] if channels == 1 else np.empty(size, dtype=np.uint8)
+        offset = channel * size
+        if inverse:
+            scrambled = decrypt_buffer(ciphertexts[channel], des_key, cipher, nonce, offset, cipher_threads)
+            check_channel_size(scrambled.size, shape)
+            np.take(scrambled, permutations[channel], out=plane, mode='clip')
+        else:
+            decrypted_size = 0
+            for position, chunk in decrypt_chunks(ciphertexts[channel], des_key, cipher, nonce, offset,
+                                                   cipher_threads):
+                decrypted_size = position + len(chunk)
+                if decrypted_size > size:
+                    break
+                plane[permutations[channel][position:decrypted_size]] = chunk
+            check_channel_size(decrypted_size, shape)
+        if channels > 1:
+            pixels[:, channel] = plane
+
+    # Decryption and unscrambling are interleaved chunk by chunk, so they are timed as one stage,
+    # together with the allocation of the output (its memory peak is the whole decryption footprint)
+    with stage('des.decrypt', size * channels):
+        pixels = np.empty((size, channels), dtype=np.uint8)
+        map_channels(decrypt_channel, channels, threads)
+    return pixels.reshape(shape)
+
+def encrypt_pixels(image_array, x0_chaos, des_key, output_file, cache=None, permutation='argsort', threads=1,
+                   cipher='des-ecb', container=False):
+    """
+    Scramble and encrypt a uint8 (H, W) grayscale or (H, W, C) color array into output_file, a path or a writable
+    binary file object. Returns the scrambled channels as a (C, H * W) array.
+    cache is an optional KeystreamCache for the chaotic permutations, permutation one of PERMUTATION_MODES,
+    cipher a backend id of CIPHER_BACKENDS; threads > 1 scrambles the channels and runs the cipher stage
+    on a thread pool. container=True writes the self-describing container format instead of the legacy layout.
+    """
+    height, width = image_array.shape[:2]
+    channels = image_array.shape[2] if image_array.ndim == 3 else 1
+
+    # Chaotic permutations of all channels, their logistic orbits are computed together
+    with stage('des.permutation', image_array.nbytes):
+        permutations = chaotic_permutations(height * width,
+                                            [x0_chaos + channel * 0.01 for channel in range(channels)],
+                                            cache=cache, mode=permutation)
+
+    # Chaos encryption of all channels, gathered straight from the interleaved (H*W, C) pixels
+    with stage('des.scramble', image_array.nbytes):
+        scrambled = permute_channels(image_array.reshape(-1, channels), permutations, threads)
+
+    # DES (or the chosen backend) encryption of each channel, streamed chunk by chunk into the file
+    with stage('des.encrypt', scrambled.nbytes):
+        write_encrypted(output_file, scrambled, image_array.shape, des_key, permutation, cipher, threads, container)
+    return scrambled
+
+def encrypt_bytes(image, x0_chaos, des_key, ndim=3, cache=None, permutation='argsort', threads=1, cipher='des-ecb',
+                  container=False):
+    """
+    Encrypt an image held in memory (encoded bytes, a file object, an array or a PIL image; a path works too)
+    and return the encrypted file as bytes, for callers that never touch the filesystem.
+    ndim=2 encrypts it as a grayscale image, ndim=3 as a color one; decrypt_pixels reads the result back.
+    """
+    output = io.BytesIO()
+    encrypt_pixels(load_array(image, 'L' if ndim == 2 else None), x0_chaos, des_key, output, cache, permutation,
+                   threads, cipher, container)
+    return output.getvalue()
+
+def encrypt_image(image_path, x0_chaos, des_key, output_file, cache=None, permutation='argsort', threads=1,
+                  cipher='des-ecb', container=False):
+    """
+    Encrypt a grayscale image using chaotic map and DES and save the result.
+    Returns the scrambled image together with the original and scrambled arrays (used by the UI).
+    image_path may also be a file object, encoded bytes, an array or a PIL image, and output_file a writable
+    binary file object; the other options are those of encrypt_pixels.
+    """
+    # Load the image and convert to grayscale
+    image_array = load_array(image_path, 'L')
+
+    # Chaos encryption, then DES (or the chosen backend) encryption into the file
+    chaos_encrypted_image = encrypt_pixels(image_array, x0_chaos, des_key, output_file, cache, permutation, threads,
+                                           cipher, container)[0].reshape(image_array.shape)
+
+    return array_image(chaos_encrypted_image), image_array, chaos_encrypted_image
+
+def decrypt_image(input_file, x0_chaos, des_key, cache=None, threads=1):
+    """
+    Decrypt a grayscale image written by encrypt_image (input_file as in map_encrypted).
+    Returns the decrypted image together with the DES-decrypted (still scrambled) and decrypted arrays.
+    """
+    # Decrypt the memory-mapped ciphertext with the recorded backend; the scrambled image is returned too
+    shape, permutation, cipher, nonce, (ciphertext,) = map_encrypted(input_file, 2)
+    with stage('des.decrypt', len(ciphertext)):
+        decrypted_data = decrypt_buffer(ciphertext, des_key, cipher, nonce, threads=threads)
+    check_channel_size(decrypted_data.size, shape)
+    scrambled_image = decrypted_data.reshape(shape)
+
+    # Chaos decryption; with a cache the inverse permutation is kept too, so decryption is a plain gather
+    inverse = cache is not None
+    with stage('des.permutation', scrambled_image.size):
+        indices = chaotic_permutations(scrambled_image.size, [x0_chaos], cache=cache, inverse=inverse,
+                                       mode=permutation)[0]
+    with stage('des.unscramble', scrambled_image.size):
+        decrypted_image = permute(scrambled_image, indices) if inverse else unpermute(scrambled_image, indices)
+
+    return array_image(decrypted_image), scrambled_image.reshape(-1), decrypted_image
+
+def image_encryption(image_path, x0_chaos, des_key, output_file, cache=None, permutation='argsort', threads=1,
+                     cipher='des-ecb', container=False):
+    """
+    Encrypt an image using chaotic map and DES and save the result.
+    """
+    encrypt_image(image_path, x0_chaos, des_key, output_file, cache, permutation, threads, cipher, container)
+    print(f"Encrypted data saved to {output_file}")
+
+def image_decryption(input_file, x0_chaos, des_key, output_image_path, cache=None, threads=1):
+    """
+    Decrypt an image using chaotic map and DES and save the result.
+    """
+    save_image(decrypt_pixels(input_file, x0_chaos, des_key, 2, cache, threads), output_image_path)
+    print(f"Decrypted image saved to {output_image_path}")
+
+def image_encryption_rgb(image_path, x0_chaos, des_key, output_file, cache=None, permutation='argsort', threads=1,
+                         cipher='des-ecb', container=False):
+    """
+    Encrypt a color image using chaotic map and DES, then save the result.
+    threads > 1 scrambles the channels and runs the cipher stage on a thread pool.
+    """
+    encrypt_pixels(load_array(image_path), x0_chaos, des_key, output_file, cache, permutation, threads, cipher,
+                   container)
+    print(f"Encrypted data saved to {output_file}")
+
+def image_decryption_rgb(input_file, x0_chaos, des_key, output_image_path, cache=None, threads=1):
+    """
+    Decrypt a color image using chaotic map and DES, then save the result.
+    threads > 1 unscrambles the channels and runs the cipher stage on a thread pool.
+    """
+    # Decryption with the recorded backend and chaos decryption straight into the interleaved output, no np.stack
+    save_image(decrypt_pixels(input_file, x0_chaos, des_key, 3, cache, threads), output_image_path)
+    print(f"Decrypted image saved to {output_image_path}")
@@ -0,0 +1,62 @@
+import numpy as np
+
+from .instrument import progress
+
+# Ukuran blok lintasan Hénon yang diproses sekaligus, menentukan puncak memori
+HENON_BLOCK_SIZE = 1 << 16
+
+# Di bawah jumlah kunci ini, lintasan per kunci (loop skalar) lebih cepat daripada satu operasi vektor per langkah;
+# diukur pada gambar 64x64 RGB: K=4 0.017 s vs 0.049 s, K=16 0.058 s vs 0.065 s, K=32 0.115 s vs 0.080 s
+HENON_BATCH_MIN_KEYS = 32
+
+# Generator 3D Hénon Map per blok, state (x, y, z) dibawa dari satu blok ke blok berikutnya
+def henon_map_3d_blocks(a, b, x0, y0, z0, iterations, block_size=HENON_BLOCK_SIZE):
+    x, y, z = float(x0), float(y0), float(z0)
+
+    for start in range(0, iterations, block_size):
+        n = min(block_size, iterations - start)
+        y_start, z_start = y, z
+
+        # Hanya x yang dihitung di loop, y dan z adalah x yang digeser satu dan dua langkah
+        xs = []
+        append = xs.append
+        for _ in range(n):
+            append(x)
+            x, y, z = a - y ** 2 - b * z, x, y
+
+        x_block = np.array(xs)
+        y_block, z_block = np.empty(n), np.empty(n)
+        y_block[0], y_block[1:] = y_start, x_block[:-1]
+        z_block[0], z_block[1:2], z_block[2:] = z_start, y_start, x_block[:-2]
+        progress('henon.map', start + n, iterations)
+        yield x_block, y_block, z_block
+
+# Fungsi untuk 3D Hénon Map
+def henon_map_3d(a, b, x0, y0, z0, iterations):
+    x, y, z = (np.concatenate(parts) for parts in zip(*henon_map_3d_blocks(a, b, x0, y0, z0, iterations)))
+    return x, y, z
+
+# Generator 3D Hénon Map untuk K kunci sekaligus, setiap langkah dihitung sebagai operasi vektor atas K lintasan.
+# Blok berbentuk (K, n); ukuran blok dibagi K agar puncak memori tetap sama seperti versi satu kunci.
+def henon_map_3d_batch_blocks(a, b, x0, y0, z0, iterations, block_size=None):
+    a, b, x, y, z = (np.array(v, dtype=np.float64) for v in np.broadcast_arrays(a, b, x0, y0, z0))
+    keys = x.size
+    block_size = block_size or max(1, HENON_BLOCK_SIZE // keys)
+    square = np.empty(keys)
+
+    for start in range(0, iterations, block_size):
+        n = min(block_size, iterations - start)
+        y_start, z_start = y, z
+
+        x_block = np.empty((n, keys))
+        for i in range(n):
+            x_block[i] = x
+            # float_power memanggil pow() seperti y ** 2 pada versi skalar; y * y berbeda di bit terakhir
+            np.float_power(y, 2.0, out=square)
+            x, y, z = a - square - b * z, x, y
+
+        y_block, z_block = np.empty((n, keys)), np.empty((n, keys))
+        y_block[0], y_block[1:] = y_start, x_block[:-1]
+        z_block[0], z_block[1:2], z_block[2:] = z_start, y_start, x_block[:-2]
+        progress('henon.map', start + n, iterations)
+        yield x_block.T, y_block.T, z_block.T
@@ -0,0 +1,88 @@
+import io
+import os
+import numpy as np
+from PIL import Image
+
+from .instrument import stage
+
+# PIL mode of a uint8 array by its number of channels
+ARRAY_MODES = {1: 'L', 2: 'LA', 3: 'RGB', 4: 'RGBA'}
+
+# Decoded pixels are copied out of PIL in strips of about this many bytes
+DECODE_STRIP_SIZE = 1 << 20
+
+def is_path(source):
+    return isinstance(source, (str, os.PathLike))
+
+def open_image(source):
+    """
+    PIL image of a path, a binary file object or the bytes of an encoded image (PNG, JPEG, ...), a uint8 array
+    or a PIL image, so every entry point works on uploads held in memory as well as on files.
+    """
+    if isinstance(source, Image.Image):
+        return source
+    if isinstance(source, np.ndarray):
+        return array_image(source)
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        source = io.BytesIO(source)
+    return Image.open(source)
+
+def load_array(image, mode=None, out=None):
+    """
+    Decode an image (any source accepted by open_image) into a writable array, converted to mode when it is in
+    another one. PIL first decodes the whole image into its own buffer (4 bytes per pixel for RGB), outside the
+    Python allocator; the pixels are then converted and copied out of it strip by strip into one array (out when
+    given, e.g. a buffer reused across images of the same size). The peak is PIL's buffer, the array and a strip:
+    neither a converted copy of the whole image nor its packed bytes (np.array(image) goes through
+    image.tobytes()) are held next to them. An array source is copied, never modified.
+    """
+    with stage('image.decode') as timed:
+        image = open_image(image)
+        width, height = image.size
+        rows = max(1, DECODE_STRIP_SIZE // (4 * max(width, 1)))
+        for top in range(0, max(height, 1), rows):
+            strip = image.crop((0, top, width, min(top + rows, height)))
+            if mode is not None and strip.mode != mode:
+                strip = strip.convert(mode)
+            strip = np.asarray(strip)
+            if out is None:
+                out = np.empty((height,) + strip.shape[1:], dtype=strip.dtype)
+            out[top:top + len(strip)] = strip
+        timed.nbytes = out.nbytes
+    return out
+
+def array_image(array):
+    """
+    PIL image of a uint8 (H, W) or (H, W, C) array through Image.frombuffer, without an intermediate copy:
+    PIL maps the array itself for the L and RGBA modes (the image then shares its memory) and unpacks it
+    once into its own layout for RGB. Raises ValueError for any other dtype or shape, which PIL would otherwise
+    reinterpret byte for byte.
+    """
+    if array.dtype != np.uint8:
+        raise ValueError(f"Image arrays must be uint8, not {array.dtype}.")
+    if not (array.ndim == 2 or array.ndim == 3 and array.shape[2] in ARRAY_MODES):
+        raise ValueError(f"Image arrays must be (H, W) or (H, W, C) with C in {sorted(ARRAY_MODES)}, "
+                         f"not {array.shape}.")
+    array = np.ascontiguousarray(array)
+    mode = ARRAY_MODES[array.shape[2] if array.ndim == 3 else 1]
+    return Image.frombuffer(mode, (array.shape[1], array.shape[0]), array, 'raw', mode, 0, 1)
+
+def save_image(image, output, **params):
+    """
+    Save a PIL image or a uint8 array to a path (format from the extension) or a binary file object
+    (PNG unless params gives another format).
+    """
+    if isinstance(image, np.ndarray):
+        image = array_image(image)
+    if not is_path(output):
+        params.setdefault('format', 'PNG')
+    with stage('image.encode', len(image.getbands()) * image.width * image.height):
+        image.save(output, **params)
+
+def encode_image(image, **params):
+    """
+    Encoded bytes (PNG unless params gives another format) of a PIL image or a uint8 array.
+    """
+    buffer = io.BytesIO()
+    save_image(image, buffer, **params)
+    return buffer.getvalue()
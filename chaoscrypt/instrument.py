@@ -0,0 +1,195 @@
+import json
+import time
+import threading
+from contextlib import contextmanager
+
+# Instrumentation is off by default: stage() then returns a shared no-op context and record() returns at once,
+# so the pipelines can stay instrumented at the cost of a function call and a flag test per stage.
+_enabled = False
+_trace_memory = False
+_callbacks = []
+_stages = {}
+_lock = threading.Lock()
+_local = threading.local()
+
+# Long scalar loops report their progress (see progress()) once per block of this many steps
+PROGRESS_BLOCK_SIZE = 1 << 16
+
+def enable(trace_memory=False):
+    """
+    Start collecting stage metrics. trace_memory=True also records the peak traced memory of every stage
+    through tracemalloc, which slows allocations down noticeably; the peak is process-wide, so it includes
+    other threads running at the same time. tracemalloc only sees the Python and NumPy allocators: buffers
+    that C libraries allocate themselves (PIL's decoded and encoded images, for instance) are not counted.
+    """
+    global _enabled, _trace_memory
+    if trace_memory:
+        import tracemalloc
+
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+    _enabled, _trace_memory = True, trace_memory
+
+def disable():
+    global _enabled, _trace_memory
+    _enabled = _trace_memory = False
+
+def is_enabled():
+    return _enabled
+
+def reset():
+    """
+    Forget the metrics collected so far.
+    """
+    with _lock:
+        _stages.clear()
+
+def add_callback(callback):
+    """
+    Call callback(stage, seconds, nbytes, peak_bytes) after every recorded stage (peak_bytes is None without
+    memory tracing). Callbacks run on the thread that ran the stage.
+    """
+    _callbacks.append(callback)
+
+def remove_callback(callback):
+    _callbacks.remove(callback)
+
+def record(stage, seconds, nbytes=0, peak_bytes=None):
+    """
+    Add one run of stage that took `seconds` and processed `nbytes` bytes.
+    """
+    if not _enabled:
+        return
+    with _lock:
+        entry = _stages.setdefault(stage, {'calls': 0, 'seconds': 0.0, 'bytes': 0, 'peak_bytes': None})
+        entry['calls'] += 1
+        entry['seconds'] += seconds
+        entry['bytes'] += nbytes
+        if peak_bytes is not None:
+            entry['peak_bytes'] = max(peak_bytes, entry['peak_bytes'] or 0)
+    for callback in _callbacks:
+        callback(stage, seconds, nbytes, peak_bytes)
+
+class Stage:
+    """
+    Context manager timing one run of a stage. nbytes may also be set inside the block, once it is known.
+    With memory tracing, the peak is the highest traced memory above the level at entry, nested stages included.
+    """
+
+    def __init__(self, name, nbytes=0):
+        self.name = name
+        self.nbytes = nbytes
+        self.peak = None
+
+    def __enter__(self):
+        if _trace_memory:
+            import tracemalloc
+
+            # The enclosing stage keeps the peak reached so far, since it is reset for this one
+            stack = _local.__dict__.setdefault('stack', [])
+            current, peak = tracemalloc.get_traced_memory()
+            if stack:
+                stack[-1].peak = max(stack[-1].peak, peak)
+            self.base, self.peak = current, current
+            stack.append(self)
+            tracemalloc.reset_peak()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        seconds = time.perf_counter() - self.start
+        peak_bytes = None
+        if self.peak is not None:
+            import tracemalloc
+
+            _local.stack.pop()
+            self.peak = max(self.peak, tracemalloc.get_traced_memory()[1])
+            if _local.stack:
+                _local.stack[-1].peak = max(_local.stack[-1].peak, self.peak)
+            peak_bytes = self.peak - self.base
+        record(self.name, seconds, self.nbytes, peak_bytes)
+        return False
+
+class NoStage:
+    """
+    What stage() returns while instrumentation is disabled; setting nbytes on it is harmless.
+    """
+
+    nbytes = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+_NOOP = NoStage()
+
+def stage(name, nbytes=0):
+    """
+    `with stage('henon.xor', image.nbytes):` times the block as one run of the stage when instrumentation
+    is enabled. `with stage('image.decode') as timed:` ... `timed.nbytes = n` counts bytes known only later.
+    """
+    return Stage(name, nbytes) if _enabled else _NOOP
+
+def progress(stage, done, total):
+    """
+    Report that a long loop of stage has done `done` of `total` steps, to the progress callback of the current
+    thread if there is one. The loops call it once per block, so it costs a thread-local lookup when unused.
+    """
+    callback = getattr(_local, 'progress', None)
+    if callback is not None:
+        callback(stage, done, total)
+
+@contextmanager
+def progress_callback(callback):
+    """
+    Call callback(stage, done, total) for the progress reported by the loops run on this thread inside the
+    block, whether or not instrumentation is enabled. An exception raised by callback propagates out of the
+    loop, which is how a job is cancelled.
+    """
+    previous = getattr(_local, 'progress', None)
+    _local.progress = callback
+    try:
+        yield
+    finally:
+        _local.progress = previous
+
+def snapshot():
+    """
+    Copy of the metrics collected so far: {stage: {'calls', 'seconds', 'bytes', 'peak_bytes'}}.
+    """
+    with _lock:
+        return {name: dict(entry) for name, entry in _stages.items()}
+
+def to_json():
+    return json.dumps({'stages': snapshot()}, indent=2)
+
+def to_prometheus(prefix='chaoscrypt'):
+    """
+    The metrics in the Prometheus text exposition format, one series per stage.
+    """
+    stages = snapshot()
+    metrics = (
+        ('stage_calls_total', 'counter', 'Runs of the stage', 'calls'),
+        ('stage_seconds_total', 'counter', 'Seconds spent in the stage', 'seconds'),
+        ('stage_bytes_total', 'counter', 'Bytes processed by the stage', 'bytes'),
+        ('stage_peak_bytes', 'gauge', 'Highest traced memory above the level at stage entry', 'peak_bytes'),
+    )
+    lines = []
+    for name, kind, description, field in metrics:
+        series = [(stage_name, entry[field]) for stage_name, entry in sorted(stages.items())
+                  if entry[field] is not None]
+        if not series:
+            continue
+        lines.append(f"# HELP {prefix}_{name} {description}.")
+        lines.append(f"# TYPE {prefix}_{name} {kind}")
+        lines.extend(f'{prefix}_{name}{{stage="{stage_name}"}} {value}' for stage_name, value in series)
+    return '\n'.join(lines) + '\n'
+
+def write_metrics(path):
+    """
+    Save a snapshot to path: JSON for a .json file, the Prometheus text format otherwise.
+    """
+    with open(path, 'w') as f:
+        f.write(to_json() if str(path).endswith('.json') else to_prometheus())
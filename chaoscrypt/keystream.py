@@ -0,0 +1,279 @@
+import base64
+import hashlib
+import numpy as np
+
+from .henon import henon_map_3d_blocks
+from .instrument import PROGRESS_BLOCK_SIZE, progress
+
+# Fungsi untuk menghasilkan urutan acak yang aman secara kriptografis menggunakan CSPRNG
+def secure_random_sequence(seed_data, length):
+    hasher = hashlib.sha256()
+    hasher.update(seed_data.encode())
+    return keystream_legacy(hasher, length)
+
+# Rantai hash legacy yang dimulai dari hasher seed yang sudah diisi
+def keystream_legacy(seed_hasher, length):
+    return legacy_chain(seed_hasher.copy(), length)
+
+# Melanjutkan rantai hash legacy langsung pada hasher; state rantai hanyalah hasher itu sendiri
+def legacy_chain(hasher, length):
+    random_sequence = np.empty(length, dtype=np.uint8)
+    buffer = memoryview(random_sequence)
+    update, digest = hasher.update, hasher.digest
+
+    # Rantai hash tetap sama seperti versi awal, tetapi digest hanya dihitung sekali per byte;
+    # kemajuan dilaporkan per blok agar UI dapat menampilkan dan membatalkannya
+    block = digest()
+    for start in range(0, length, PROGRESS_BLOCK_SIZE):
+        end = min(start + PROGRESS_BLOCK_SIZE, length)
+        for i in range(start, end):
+            update(block)
+            block = digest()
+            buffer[i] = block[0]
+        progress('henon.keystream', end, length)
+
+    return random_sequence
+
+# Ekspansi counter: blok ke-i adalah digest hasher dasar (yang sudah berisi kunci) setelah diberi counter i,
+# dimulai dari offset sembarang; panjang blok sama dengan digest_size hasher
+def expand_counter(base, length, offset=0):
+    random_sequence = np.empty(length, dtype=np.uint8)
+
+    # Kemajuan dilaporkan per blok agar UI dapat menampilkan dan membatalkannya
+    for start in range(0, length, PROGRESS_BLOCK_SIZE):
+        end = min(start + PROGRESS_BLOCK_SIZE, length)
+        fill_counter(base, memoryview(random_sequence[start:end]), offset + start)
+        progress('henon.keystream', end, length)
+
+    return random_sequence
+
+# Mengisi buffer dengan keystream counter mulai dari offset, tanpa laporan kemajuan
+def fill_counter(base, buffer, offset):
+    # Mulai dari blok counter yang memuat offset yang diminta
+    position, length = 0, len(buffer)
+    counter, skip = divmod(offset, base.digest_size)
+    while position < length:
+        hasher = base.copy()
+        hasher.update(counter.to_bytes(8, 'big'))
+        block = hasher.digest()[skip:]
+        end = min(position + len(block), length)
+        buffer[position:end] = block[:end - position]
+        position, counter, skip = end, counter + 1, 0
+
+# Mesin keystream berbasis counter: setiap digest SHA-256 menghasilkan 32 byte keystream
+def keystream_sha256_ctr(seed_hasher, length, offset=0):
+    return expand_sha256_ctr(seed_hasher.digest(), length, offset)
+
+# Ekspansi counter SHA-256 dari kunci 32 byte
+def expand_sha256_ctr(key, length, offset=0):
+    return expand_counter(hashlib.sha256(key), length, offset)
+
+# Mesin keystream berbasis counter dengan BLAKE2b (64 byte per digest)
+def keystream_blake2b_ctr(seed_hasher, length, offset=0):
+    return expand_blake2b_ctr(seed_hasher.digest(), length, offset)
+
+# Ekspansi counter BLAKE2b dari kunci 64 byte
+def expand_blake2b_ctr(key, length, offset=0):
+    return expand_counter(hashlib.blake2b(key=key, digest_size=64), length, offset)
+
+# Hasher SHAKE256 dari pycryptodome (read() dapat dipanggil berulang), diimpor saat mesin ini pertama kali dipakai
+def shake256():
+    from Crypto.Hash import SHAKE256
+    return SHAKE256.new()
+
+# Mesin keystream XOF: SHAKE256 diperas langsung sepanjang keystream yang dibutuhkan,
+# pemanggilan berikutnya melanjutkan aliran yang sama
+def keystream_shake256(seed_hasher, length):
+    random_sequence = np.empty(length, dtype=np.uint8)
+    # Dibaca per blok (hasilnya sama dengan satu read panjang) agar kemajuan dapat dilaporkan
+    for start in range(0, length, PROGRESS_BLOCK_SIZE):
+        end = min(start + PROGRESS_BLOCK_SIZE, length)
+        random_sequence[start:end] = np.frombuffer(seed_hasher.read(end - start), dtype=np.uint8)
+        progress('henon.keystream', end, length)
+    return random_sequence
+
+# Daftar mesin keystream beserta fungsi hash penampung seed, "legacy" adalah rantai hash asli
+KEYSTREAM_ENGINES = {
+    'legacy': (hashlib.sha256, keystream_legacy),
+    'sha256-ctr': (hashlib.sha256, keystream_sha256_ctr),
+    'blake2b-ctr': (hashlib.blake2b, keystream_blake2b_ctr),
+    'shake256': (shake256, keystream_shake256),
+}
+
+# Mode penurunan seed: "string" meng-hash teks desimal lintasan (file lama),
+# "binary" meng-hash byte float64 mentah. Keduanya dimasukkan ke hasher per blok
+# sehingga string seed utuh tidak pernah dibuat.
+SEED_MODES = ('string', 'binary')
+
+# Memasukkan blok-blok lintasan Hénon (x + y + z) ke hasher seed secara bertahap
+def derive_seed(blocks, hasher, mode='string'):
+    if mode not in SEED_MODES:
+        raise ValueError(f"Mode seed tidak dikenal: {mode}")
+
+    for x, y, z in blocks:
+        trajectory = x + y + z
+        if mode == 'string':
+            hasher.update(''.join(map(str, trajectory)).encode())
+        else:
+            hasher.update(memoryview(trajectory.astype('<f8', copy=False)).cast('B'))
+
+    return hasher
+
+# Menurunkan seed untuk K kunci sekaligus; lintasan kunci ke-k dipotong sepanjang lengths[k]
+def derive_seed_batch(blocks, hashers, lengths, modes):
+    position = 0
+
+    for x, y, z in blocks:
+        for k, hasher in enumerate(hashers):
+            end = lengths[k] - position
+            if end > 0:
+                derive_seed([(x[k, :end], y[k, :end], z[k, :end])], hasher, modes[k])
+        position += x.shape[1]
+
+    return hashers
+
+# Mesin keystream yang dapat diakses acak: keystream dibagi menjadi segmen sepanjang HENON_CHECKPOINT_INTERVAL langkah,
+# setiap segmen adalah ekspansi SHA-256 counter yang kuncinya diturunkan dari state Hénon di awal segmen (checkpoint).
+# Dengan checkpoint tersimpan, sebagian gambar dapat didekripsi tanpa mengulang lintasan dari langkah 0.
+SEEKABLE_ENGINE = 'henon-seekable-v1'
+HENON_CHECKPOINT_INTERVAL = 1 << 16
+
+def seekable_master_key(a, b, x0, y0, z0):
+    return hashlib.sha256(SEEKABLE_ENGINE.encode() + np.array([a, b, x0, y0, z0], dtype='<f8').tobytes()).digest()
+
+# State (x, y, z) Hénon Map di setiap kelipatan interval langkah
+def henon_checkpoints(a, b, x0, y0, z0, iterations, interval=HENON_CHECKPOINT_INTERVAL):
+    blocks = henon_map_3d_blocks(a, b, x0, y0, z0, iterations, interval)
+    return np.array([(x[0], y[0], z[0]) for x, y, z in blocks], dtype=np.float64).reshape(-1, 3)
+
+# Keystream sepanjang length mulai dari offset, hanya segmen yang tersentuh yang dihitung;
+# kemajuan dilaporkan per segmen
+def seekable_keystream(master_key, checkpoints, interval, offset, length):
+    random_sequence = np.empty(length, dtype=np.uint8)
+    position = 0
+
+    while position < length:
+        segment, segment_offset = divmod(offset + position, interval)
+        n = min(interval - segment_offset, length - position)
+        segment_hasher = hashlib.sha256(master_key + segment.to_bytes(8, 'big'))
+        segment_hasher.update(checkpoints[segment].astype('<f8').tobytes())
+        fill_counter(hashlib.sha256(segment_hasher.digest()), memoryview(random_sequence[position:position + n]),
+                     segment_offset)
+        position += n
+        progress('henon.keystream', position, length)
+
+    return random_sequence
+
+# Checkpoint setara dengan kunci, jadi disimpan dalam bentuk terenkripsi (XOR dengan SHAKE256 dari kunci master)
+def pack_checkpoints(master_key, checkpoints):
+    data = np.frombuffer(checkpoints.astype('<f8').tobytes(), dtype=np.uint8)
+    pad = np.frombuffer(hashlib.shake_256(master_key + b'checkpoints').digest(data.size), dtype=np.uint8)
+    return base64.b64encode(np.bitwise_xor(data, pad).tobytes()).decode()
+
+def unpack_checkpoints(master_key, packed):
+    data = np.frombuffer(base64.b64decode(packed), dtype=np.uint8)
+    pad = np.frombuffer(hashlib.shake_256(master_key + b'checkpoints').digest(data.size), dtype=np.uint8)
+    return np.frombuffer(np.bitwise_xor(data, pad).tobytes(), dtype='<f8').reshape(-1, 3)
+
+# Metadata mesin seekable yang disimpan di PNG atau header JSON
+def seekable_metadata(master_key, checkpoints):
+    return {'checkpoint_interval': str(HENON_CHECKPOINT_INTERVAL), 'henon_checkpoints': pack_checkpoints(master_key, checkpoints)}
+
+# Mesin berbasis counter yang dapat dibagi ke beberapa proses: setiap rentang offset dihitung independen
+COUNTER_EXPANDERS = {
+    'sha256-ctr': expand_sha256_ctr,
+    'blake2b-ctr': expand_blake2b_ctr,
+}
+
+# Worker: menghitung keystream [start, end) dan menulisnya langsung ke shared memory, hasil tidak di-pickle
+def keystream_worker(shm_name, length, engine, key_material, start, end):
+    from multiprocessing import shared_memory
+
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        random_sequence = np.ndarray((length,), dtype=np.uint8, buffer=shm.buf)
+        if engine == SEEKABLE_ENGINE:
+            master_key, checkpoints, interval = key_material
+            random_sequence[start:end] = seekable_keystream(master_key, checkpoints, interval, start, end - start)
+        else:
+            random_sequence[start:end] = COUNTER_EXPANDERS[engine](key_material, end - start, start)
+        del random_sequence
+    finally:
+        shm.close()
+
+# Keystream paralel dengan ProcessPoolExecutor; key_material adalah digest seed (mesin counter)
+# atau (master_key, checkpoints, interval) untuk mesin seekable
+def parallel_keystream(engine, key_material, length, workers):
+    from concurrent.futures import ProcessPoolExecutor
+    from multiprocessing import shared_memory
+
+    shm = shared_memory.SharedMemory(create=True, size=max(length, 1))
+    try:
+        # Dibagi menjadi lebih banyak potongan daripada worker agar beban tetap seimbang
+        bounds = np.linspace(0, length, workers * 4 + 1).astype(np.int64)
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                executor.submit(keystream_worker, shm.name, length, engine, key_material, int(start), int(end)):
+                int(end - start)
+                for start, end in zip(bounds[:-1], bounds[1:]) if end > start
+            }
+            # Kemajuan dilaporkan per potongan yang selesai; jika dibatalkan, potongan yang belum mulai dibuang
+            done = 0
+            try:
+                for future in futures:
+                    future.result()
+                    done += futures[future]
+                    progress('henon.keystream', done, length)
+            except BaseException:
+                for future in futures:
+                    future.cancel()
+                raise
+        random_sequence = np.ndarray((length,), dtype=np.uint8, buffer=shm.buf).copy()
+    finally:
+        shm.close()
+        shm.unlink()
+
+    return random_sequence
+
+# Keystream lengkap untuk encrypt/decrypt: mesin counter dan seekable memakai beberapa proses jika workers > 1,
+# rantai legacy dan SHAKE256 bersifat berurutan sehingga selalu dihitung di satu proses
+def generate_keystream(engine, seed_hasher, length, workers=1):
+    if workers > 1 and engine in COUNTER_EXPANDERS:
+        return parallel_keystream(engine, seed_hasher.digest(), length, workers)
+    return KEYSTREAM_ENGINES[engine][1](seed_hasher, length)
+
+def generate_seekable_keystream(master_key, checkpoints, length, workers=1, interval=HENON_CHECKPOINT_INTERVAL):
+    if workers > 1:
+        return parallel_keystream(SEEKABLE_ENGINE, (master_key, checkpoints, interval), length, workers)
+    return seekable_keystream(master_key, checkpoints, interval, 0, length)
+
+# Membaca keystream secara berurutan per potongan, sehingga keystream utuh tidak pernah dibuat
+def keystream_reader(engine, seed_hasher):
+    keystream = KEYSTREAM_ENGINES[engine][1]
+    hasher = seed_hasher.copy() if engine == 'legacy' else seed_hasher
+    offset = 0
+
+    def read(length):
+        nonlocal offset
+        if engine == 'legacy':
+            random_sequence = legacy_chain(hasher, length)
+        elif engine == 'shake256':
+            random_sequence = keystream(hasher, length)
+        else:
+            random_sequence = keystream(hasher, length, offset)
+        offset += length
+        return random_sequence
+
+    return read
+
+# Pembaca berurutan untuk mesin seekable
+def seekable_reader(master_key, checkpoints, interval):
+    offset = 0
+
+    def read(length):
+        nonlocal offset
+        random_sequence = seekable_keystream(master_key, checkpoints, interval, offset, length)
+        offset += length
+        return random_sequence
+
+    return read
@@ -0,0 +1,271 @@
+import numpy as np
+
+from .instrument import PROGRESS_BLOCK_SIZE, progress
+
+# Below this many orbits, filling each row with the scalar loop beats one numpy call per step
+LOGISTIC_VECTOR_MIN_KEYS = 16
+LOGISTIC_BLOCK_SIZE = 4096
+
+def logistic_map(length, x0, r=3.99, out=None):
+    """
+    Logistic map for generating pseudo-random sequence, written into a preallocated float64 array.
+    """
+    sequence = np.empty(length) if out is None else out
+    buffer = memoryview(sequence)
+    x = float(x0)
+    for start in range(0, length, PROGRESS_BLOCK_SIZE):
+        end = min(start + PROGRESS_BLOCK_SIZE, length)
+        for i in range(start, end):
+            x = r * x * (1 - x)
+            buffer[i] = x
+        progress('logistic.map', end, length)
+    return sequence
+
+def logistic_map_batch(length, x0s, r=3.99):
+    """
+    Logistic map for several initial values: row k is bit-identical to logistic_map(length, x0s[k], r).
+    With many orbits every step advances all of them as one vector operation; with only a few
+    (such as the three RGB channels) each row is filled by the scalar loop, which is cheaper.
+    """
+    x = np.array(x0s, dtype=np.float64)
+    keys = x.size
+    sequences = np.empty((keys, length))
+    if keys < LOGISTIC_VECTOR_MIN_KEYS:
+        for k in range(keys):
+            logistic_map(length, x[k], r, out=sequences[k])
+        return sequences
+
+    # Steps are collected in a (block, K) buffer and copied to the rows a block at a time
+    block = np.empty((min(LOGISTIC_BLOCK_SIZE, length), keys))
+    one_minus_x = np.empty(keys)
+    for start in range(0, length, LOGISTIC_BLOCK_SIZE):
+        n = min(LOGISTIC_BLOCK_SIZE, length - start)
+        for i in range(n):
+            # Same operation order as the scalar loop: (r * x) * (1 - x)
+            np.subtract(1, x, out=one_minus_x)
+            np.multiply(r, x, out=x)
+            np.multiply(x, one_minus_x, out=x)
+            block[i] = x
+        sequences[:, start:start + n] = block[:n].T
+        progress('logistic.map', start + n, length)
+    return sequences
+
+def chaos_encrypt(image_array, sequence):
+    """
+    Encrypt image array using chaotic sequence.
+    """
+    return permute(image_array, argsort_sequence(sequence))
+
+def chaos_decrypt(image_array, sequence):
+    """
+    Decrypt image array using chaotic sequence.
+    """
+    return unpermute(image_array, argsort_sequence(sequence))
+
+# Bit patterns at or above this are negative, infinite or NaN; below it they sort like the float values
+FLOAT64_INF_BITS = np.uint64(0x7FF0000000000000)
+
+def argsort_sequence(sequence):
+    """
+    Same indices as np.argsort(sequence, kind='stable'), about twice as fast for the non-negative logistic
+    sequences, and as int32 whenever the length allows. Without repeated values this is the order of the
+    original np.argsort; ties keep their index order.
+
+    Each value's bit pattern is truncated and packed with its index into one uint64, so a plain
+    (SIMD) np.sort replaces the indirect argsort. Runs whose truncated prefixes collide are re-sorted
+    by their full value afterwards, stably. Negative or non-finite values fall back to np.argsort.
+    """
+    sequence = np.ascontiguousarray(sequence, dtype=np.float64)
+    n = sequence.size
+    index_bits = max(1, (n - 1).bit_length())
+    bits = sequence.view(np.uint64)
+    index_dtype = np.int32 if n <= np.iinfo(np.int32).max else np.int64
+    if index_bits > 40 or not (bits < FLOAT64_INF_BITS).all():
+        return np.argsort(sequence, kind='stable').astype(index_dtype, copy=False)
+
+    index_mask = np.uint64((1 << index_bits) - 1)
+    keys = bits & ~index_mask
+    keys |= np.arange(n, dtype=np.uint64)
+    keys.sort()
+    indices = (keys & index_mask).astype(index_dtype)
+
+    # Neighbours sharing a truncated prefix may be out of order: re-sort each such run by full value
+    keys &= ~index_mask
+    collides = keys[1:] == keys[:-1]
+    if collides.any():
+        in_run = np.concatenate(([False], collides)) | np.concatenate((collides, [False]))
+        members = np.flatnonzero(in_run)
+        run_ids = np.cumsum(np.concatenate(([True], ~collides)))[members]
+        # lexsort is stable and each run is in index order, so equal values keep their index order
+        order = np.lexsort((sequence[indices[members]], run_ids))
+        indices[members] = indices[members][order]
+
+    return indices
+
+def inverse_permutation(sequence_indices):
+    """
+    Inverse of a permutation: permute(image, inverse_permutation(p)) == unpermute(image, p), as a gather.
+    """
+    inverse = np.empty_like(sequence_indices)
+    inverse[sequence_indices] = np.arange(sequence_indices.size, dtype=inverse.dtype)
+    return inverse
+
+# Permutation modes: "argsort" sorts one logistic orbit over the whole channel (legacy files);
+# "block-v1" shuffles each PERMUTATION_BLOCK_SIZE-pixel block with a chaotic Fisher-Yates and then
+# shuffles the blocks, so every output block reads from a single input block.
+PERMUTATION_MODES = ('argsort', 'block-v1')
+PERMUTATION_BLOCK_SIZE = 4096
+PERMUTATION_WARMUP = 64
+GOLDEN_RATIO_FRACTION = 0.6180339887498949
+
+def fisher_yates_block(size, x0, r=3.99):
+    """
+    Chaotic Fisher-Yates shuffle of range(size), drawing from a logistic orbit started at x0.
+    """
+    indices = list(range(size))
+    x = float(x0)
+    for _ in range(PERMUTATION_WARMUP):
+        x = r * x * (1 - x)
+    for i in range(size - 1, 0, -1):
+        x = r * x * (1 - x)
+        j = int(x * (i + 1))
+        indices[i], indices[j] = indices[j], indices[i]
+    return np.array(indices, dtype=np.int64)
+
+def block_permutation(length, x0, r=3.99, block_size=PERMUTATION_BLOCK_SIZE):
+    """
+    Permutation of the "block-v1" mode, built in O(N).
+
+    Every full block runs its own logistic orbit, started from x0 spread by the golden ratio and
+    warmed up so neighbouring blocks decorrelate. All orbits advance together as one vector per
+    step, driving a Fisher-Yates shuffle of each block. A separate orbit from x0 shuffles the full
+    blocks; a trailing partial block is shuffled in place.
+    """
+    blocks, tail = divmod(length, block_size)
+    x = (x0 + np.arange(1, blocks + 1) * GOLDEN_RATIO_FRACTION) % 1.0
+    one_minus_x = np.empty(blocks)
+
+    def step():
+        np.subtract(1, x, out=one_minus_x)
+        np.multiply(r, x, out=x)
+        np.multiply(x, one_minus_x, out=x)
+
+    for _ in range(PERMUTATION_WARMUP):
+        step()
+
+    # within[i, k] is the source offset of position i in block k; row i is contiguous while shuffling
+    within = np.repeat(np.arange(block_size, dtype=np.int32)[:, None], blocks, axis=1)
+    columns = np.arange(blocks)
+    for i in range(block_size - 1, 0, -1):
+        step()
+        j = (x * (i + 1)).astype(np.intp)
+        swapped = within[j, columns]
+        within[j, columns] = within[i]
+        within[i] = swapped
+        if i % 64 == 0:
+            progress('logistic.permutation', block_size - i, block_size)
+
+    index_dtype = np.int32 if length <= np.iinfo(np.int32).max else np.int64
+    block_order = fisher_yates_block(blocks, x0, r).astype(index_dtype)
+    sequence_indices = np.empty(length, dtype=index_dtype)
+    body = sequence_indices[:blocks * block_size].reshape(blocks, block_size)
+    np.add(block_order[:, None] * block_size, within.T, out=body, casting='unsafe')
+    if tail:
+        tail_x0 = (x0 + (blocks + 1) * GOLDEN_RATIO_FRACTION) % 1.0
+        sequence_indices[blocks * block_size:] = blocks * block_size + fisher_yates_block(tail, tail_x0, r)
+    return sequence_indices
+
+def chaotic_permutation(length, x0, r=3.99, cache=None, mode='argsort'):
+    """
+    Permutation applied by the chaotic stage: for the legacy "argsort" mode, the indices that sort
+    the logistic sequence (as chaos_encrypt does). With a KeystreamCache it is read back from disk
+    when the same (mode, x0, r, length) was seen before.
+    """
+    return chaotic_permutations(length, [x0], r, cache, mode=mode)[0]
+
+def chaotic_permutations(length, x0s, r=3.99, cache=None, inverse=False, mode='argsort'):
+    """
+    chaotic_permutation for several initial values; the legacy orbits missing from the cache are computed together.
+    With inverse=True the inverse permutations are returned (and cached) instead.
+    """
+    if mode not in PERMUTATION_MODES:
+        raise ValueError(f"Unknown permutation mode: {mode}")
+
+    version = mode + '-inverse' if inverse else mode
+    permutations = [cache.get('logistic', version, (x0, r), length) if cache else None for x0 in x0s]
+    missing = [k for k, permutation in enumerate(permutations) if permutation is None]
+    if missing:
+        if inverse:
+            forward = chaotic_permutations(length, [x0s[k] for k in missing], r, cache, mode=mode)
+            computed = [inverse_permutation(np.asarray(permutation)) for permutation in forward]
+        elif mode == 'argsort':
+            sequences = logistic_map_batch(length, [x0s[k] for k in missing], r)
+            computed = [argsort_sequence(sequence) for sequence in sequences]
+        else:
+            computed = [block_permutation(length, x0s[k], r) for k in missing]
+        for k, permutation in zip(missing, computed):
+            permutations[k] = permutation
+            if cache is not None:
+                cache.put('logistic', version, (x0s[k], r), length, permutation)
+    return permutations
+
+def permute(image_array, sequence_indices):
+    """
+    Scramble the pixels of image_array with a precomputed permutation.
+    """
+    return np.take(image_array.reshape(-1), sequence_indices).reshape(image_array.shape)
+
+def unpermute(image_array, sequence_indices):
+    """
+    Undo permute.
+    """
+    decrypted_flat = np.empty(image_array.size, dtype=image_array.dtype)
+    decrypted_flat[sequence_indices] = image_array.reshape(-1)
+    return decrypted_flat.reshape(image_array.shape)
+
+def map_channels(function, channels, threads=1):
+    """
+    Call function(channel) for every channel, on a thread pool when threads > 1.
+    NumPy gathers and scatters release the GIL, so channels scramble in parallel.
+    """
+    if threads > 1 and channels > 1:
+        from concurrent.futures import ThreadPoolExecutor
+
+        with ThreadPoolExecutor(max_workers=min(threads, channels)) as executor:
+            return list(executor.map(function, range(channels)))
+    return [function(channel) for channel in range(channels)]
+
+def permute_channels(pixels, permutations, threads=1):
+    """
+    Scramble every channel of an interleaved (N, C) pixel array with its own permutation, returning a (C, N) array.
+    The pixels are de-interleaved in a single pass, then each channel is gathered contiguously into the result;
+    random gathers straight from a stride-C column are slower than that extra sequential pass.
+    """
+    planes = np.ascontiguousarray(pixels.T)
+    scrambled = np.empty_like(planes)
+
+    def scramble(channel):
+        np.take(planes[channel], permutations[channel], out=scrambled[channel], mode='clip')
+
+    map_channels(scramble, planes.shape[0], threads)
+    return scrambled
+
+def unpermute_channels(scrambled, permutations, inverse=False, threads=1):
+    """
+    Undo permute_channels: scrambled holds one flat array per channel, the result is the interleaved (N, C) array.
+    With inverse=True, permutations are the inverse permutations and each channel is a gather instead of a scatter.
+    Each channel is unscrambled into a contiguous plane, then written into its column of the result in one pass.
+    """
+    channels = len(scrambled)
+    pixels = np.empty((len(scrambled[0]), channels), dtype=scrambled[0].dtype)
+
+    def unscramble(channel):
+        if inverse:
+            plane = np.take(scrambled[channel], permutations[channel], mode='clip')
+        else:
+            plane = np.empty_like(scrambled[channel])
+            plane[permutations[channel]] = scrambled[channel]
+        pixels[:, channel] = plane
+
+    map_channels(unscramble, channels, threads)
+    return pixels
@@ -0,0 +1,62 @@
+import numpy as np
+
+def calculate_metrics(original, encrypted):
+    """
+    NPCR and UACI between two images (percent) and the entropy of the second one (bits).
+    """
+    original_array = np.array(original, dtype=np.uint8)
+    encrypted_array = np.array(encrypted, dtype=np.uint8)
+
+    # NPCR
+    diff_pixels = np.sum(original_array != encrypted_array)
+    total_pixels = original_array.size
+    npcr = (diff_pixels / total_pixels) * 100
+
+    # UACI
+    diff_intensity = np.abs(original_array.astype(int) - encrypted_array.astype(int))
+    uaci = np.mean(diff_intensity) / 255 * 100
+
+    # Entropy
+    histogram, _ = np.histogram(encrypted_array.flatten(), bins=256, range=(0, 256))
+    histogram = histogram / histogram.sum()
+    entropy = -np.sum(histogram * np.log2(histogram + np.finfo(float).eps))
+
+    return npcr, uaci, entropy
+
+def draw_histograms(figure, original, encrypted):
+    """
+    Draw the original and encrypted histograms side by side on a matplotlib figure.
+    """
+    edges = np.arange(257)
+    panels = ((original, 'blue', "Original Image Histogram"), (encrypted, 'red', "Encrypted Image Histogram"))
+    for i, (image, color, title) in enumerate(panels):
+        axes = figure.add_subplot(1, 2, i + 1)
+        counts = np.bincount(np.asarray(image, dtype=np.uint8).ravel(), minlength=256)
+        axes.stairs(counts, edges, fill=True, color=color, alpha=0.7)
+        axes.set_title(title)
+    figure.tight_layout()
+
+def plot_histograms(original, encrypted, master=None):
+    """
+    Show the original and encrypted histograms side by side. With a Tk master widget the figure opens in a
+    Toplevel window of it and the call returns at once; otherwise pyplot shows it and blocks until it is closed.
+    matplotlib is only imported here.
+    """
+    if master is None:
+        import matplotlib.pyplot as plt
+
+        draw_histograms(plt.figure(figsize=(12, 6)), original, encrypted)
+        plt.show()
+        return
+
+    import tkinter as tk
+    from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+    from matplotlib.figure import Figure
+
+    window = tk.Toplevel(master)
+    window.title("Histograms")
+    figure = Figure(figsize=(12, 6))
+    draw_histograms(figure, original, encrypted)
+    canvas = FigureCanvasTkAgg(figure, master=window)
+    canvas.draw()
+    canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
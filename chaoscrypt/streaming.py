@@ -0,0 +1,197 @@
+import json
+from pathlib import Path
+import numpy as np
+
+from .henon import henon_map_3d_blocks
+from .imaging import is_path, load_array
+from .instrument import stage
+from .keystream import (
+    HENON_CHECKPOINT_INTERVAL, KEYSTREAM_ENGINES, SEEKABLE_ENGINE, derive_seed, henon_checkpoints, keystream_reader,
+    seekable_master_key, seekable_metadata, seekable_reader, unpack_checkpoints,
+)
+
+# Batas memori default mode streaming (byte) dan ukuran tile untuk keluaran TIFF
+STREAM_MEMORY_BUDGET = 256 * 1024 * 1024
+TIFF_TILE_SIZE = 256
+
+# Header (bentuk gambar; untuk keluaran terenkripsi juga mesin keystream, mode seed dan checkpoint)
+# disimpan di file JSON di samping keluaran streaming
+def read_stream_header(image_path):
+    header_path = Path(str(image_path) + '.json')
+    if not header_path.exists():
+        return {}
+    with open(header_path) as f:
+        return json.load(f)
+
+def write_stream_header(image_path, shape, metadata=None):
+    header = {'shape': list(shape), 'dtype': 'uint8'}
+    header.update(metadata or {})
+    with open(str(image_path) + '.json', 'w') as f:
+        json.dump(header, f)
+
+# Membuka gambar sebagai rangkaian strip baris; mengembalikan bentuk gambar dan generator (baris_awal, strip).
+# .npy, .raw dan TIFF tanpa kompresi dibaca lewat memmap, TIFF ber-tile dibaca per baris tile,
+# format lain (PNG, JPG, ...) didekode utuh sekali oleh PIL.
+def open_image_strips(image_path, mode, memory_budget):
+    suffix = Path(image_path).suffix.lower()
+    if suffix == '.npy':
+        image_array = np.load(image_path, mmap_mode='r')
+    elif suffix == '.raw':
+        shape = tuple(read_stream_header(image_path)['shape'])
+        image_array = np.memmap(image_path, dtype=np.uint8, mode='r', shape=shape)
+    elif suffix in ('.tif', '.tiff'):
+        import tifffile  # Dependensi opsional, hanya dibutuhkan untuk TIFF
+        try:
+            image_array = tifffile.memmap(image_path, mode='r')
+        except ValueError:
+            return open_tiff_segments(image_path)
+    else:
+        image_array = load_array(image_path, mode)
+
+    shape = image_array.shape
+    row_bytes = int(np.prod(shape[1:]))
+    # Strip masukan, potongan keystream dan hasil XOR harus muat dalam batas memori
+    strip_rows = max(1, memory_budget // (3 * row_bytes))
+
+    def strips():
+        for start in range(0, shape[0], strip_rows):
+            yield start, np.asarray(image_array[start:start + strip_rows])
+
+    return shape, strips()
+
+# TIFF terkompresi atau ber-tile: segmen (tile/strip) didekode satu per satu dan digabung per baris tile
+def open_tiff_segments(image_path):
+    import tifffile
+    tiff = tifffile.TiffFile(image_path)
+    page = tiff.pages[0]
+    shape = page.shape
+
+    def strips():
+        band, band_start = None, None
+        with tiff:
+            for segment, indices, _ in page.segments():
+                row, col = indices[-3], indices[-2]
+                if row != band_start:
+                    if band is not None:
+                        yield band_start, band
+                    band_start = row
+                    band = np.empty((min(segment.shape[1], shape[0] - row),) + shape[1:], dtype=np.uint8)
+                height, width = band.shape[0], min(segment.shape[2], shape[1] - col)
+                band[:, col:col + width] = segment[0, :height, :width].reshape((height, width) + shape[2:])
+            if band is not None:
+                yield band_start, band
+
+    return shape, strips()
+
+# Menulis strip ke .npy (memmap), TIFF ber-tile (butuh tifffile) atau file mentah
+def write_image_strips(output_path, shape, strips):
+    suffix = Path(output_path).suffix.lower()
+    if suffix == '.npy':
+        output = np.lib.format.open_memmap(output_path, mode='w+', dtype=np.uint8, shape=shape)
+        for start, strip in strips:
+            output[start:start + len(strip)] = strip
+        output.flush()
+        del output
+    elif suffix in ('.tif', '.tiff'):
+        import tifffile  # Dependensi opsional, hanya dibutuhkan untuk TIFF
+        tifffile.imwrite(output_path, tiff_tiles(shape, strips), shape=shape, dtype=np.uint8,
+                         tile=(TIFF_TILE_SIZE, TIFF_TILE_SIZE),
+                         photometric='rgb' if len(shape) == 3 and shape[2] == 3 else 'minisblack')
+    else:
+        with open(output_path, 'wb') as f:
+            for _, strip in strips:
+                f.write(memoryview(np.ascontiguousarray(strip)).cast('B'))
+
+# Menyusun ulang strip dengan tinggi sembarang menjadi tile TIFF berurutan baris demi baris
+def tiff_tiles(shape, strips):
+    band = np.zeros((TIFF_TILE_SIZE,) + shape[1:], dtype=np.uint8)
+    filled, rows_done = 0, 0
+
+    for _, strip in strips:
+        while len(strip):
+            n = min(TIFF_TILE_SIZE - filled, len(strip))
+            band[filled:filled + n] = strip[:n]
+            strip, filled, rows_done = strip[n:], filled + n, rows_done + n
+            if filled == TIFF_TILE_SIZE or rows_done == shape[0]:
+                for col in range(0, shape[1], TIFF_TILE_SIZE):
+                    yield band[:filled, col:col + TIFF_TILE_SIZE]
+                filled = 0
+
+# XOR strip demi strip dengan potongan keystream yang sesuai; urutan strip mengikuti urutan baris
+def xor_image_strips(strips, read_keystream):
+    for start, strip in strips:
+        with stage('henon.keystream', strip.size):
+            random_sequence = read_keystream(strip.size).reshape(strip.shape)
+        with stage('henon.xor', strip.size):
+            np.bitwise_xor(strip, random_sequence, out=random_sequence)
+        yield start, random_sequence
+
+# Membuka gambar terenkripsi sebagai array yang dapat diakses acak (memmap untuk .npy, .raw dan TIFF tanpa kompresi);
+# selain path, sumber lain (objek file, byte, gambar PIL) didekode utuh
+def open_image_array(image_path, mode):
+    suffix = Path(image_path).suffix.lower() if is_path(image_path) else None
+    if suffix == '.npy':
+        return np.load(image_path, mmap_mode='r')
+    if suffix == '.raw':
+        return np.memmap(image_path, dtype=np.uint8, mode='r', shape=tuple(read_stream_header(image_path)['shape']))
+    if suffix in ('.tif', '.tiff'):
+        import tifffile  # Dependensi opsional, hanya dibutuhkan untuk TIFF
+        try:
+            return tifffile.memmap(image_path, mode='r')
+        except ValueError:
+            return tifffile.imread(image_path)
+    return load_array(image_path, mode)
+
+# Enkripsi dan dekripsi streaming adalah XOR yang sama: membuka gambar per strip, menurunkan keystream dari
+# lintasan Hénon lalu menulis setiap strip yang sudah di-XOR. Untuk mesin seekable, checkpoints dari header
+# dipakai jika diberikan (dekripsi), selain itu dihitung (enkripsi). Mengembalikan bentuk gambar dan
+# metadata mesin seekable yang baru dihitung.
+def xor_image_streaming(image_path, output_path, a, b, x0, y0, z0, engine, seed_mode, memory_budget, mode,
+                        checkpoints=None, interval=HENON_CHECKPOINT_INTERVAL):
+    shape, strips = open_image_strips(image_path, mode, memory_budget)
+    iterations = int(np.prod(shape))
+
+    # Tahap 1: seed (atau checkpoint untuk mesin seekable) diturunkan dari lintasan Hénon blok demi blok
+    metadata = {}
+    if engine == SEEKABLE_ENGINE:
+        master_key = seekable_master_key(a, b, x0, y0, z0)
+        if checkpoints is None:
+            with stage('henon.checkpoints', iterations):
+                checkpoints = henon_checkpoints(a, b, x0, y0, z0, iterations, interval)
+            metadata = seekable_metadata(master_key, checkpoints)
+        read_keystream = seekable_reader(master_key, checkpoints, interval)
+    else:
+        seed_hash, _ = KEYSTREAM_ENGINES[engine]
+        with stage('henon.seed', iterations):
+            seed_hasher = derive_seed(henon_map_3d_blocks(a, b, x0, y0, z0, iterations), seed_hash(), seed_mode)
+        read_keystream = keystream_reader(engine, seed_hasher)
+
+    # Tahap 2: setiap strip di-XOR dengan potongan keystream pada offset yang sama lalu langsung ditulis
+    write_image_strips(output_path, shape, xor_image_strips(strips, read_keystream))
+    return shape, metadata
+
+# Fungsi untuk mengenkripsi gambar sangat besar per strip baris dengan puncak memori dibatasi memory_budget.
+# Keluaran berupa .npy, .tif/.tiff atau file mentah, dengan header JSON di sampingnya.
+# mode adalah mode warna PIL untuk masukan non-array: 'RGB' atau 'L' (grayscale).
+def encrypt_image_streaming(image_path, output_path, a, b, x0, y0, z0, engine='legacy', seed_mode='string',
+                            memory_budget=STREAM_MEMORY_BUDGET, mode='RGB'):
+    shape, metadata = xor_image_streaming(image_path, output_path, a, b, x0, y0, z0, engine, seed_mode, memory_budget,
+                                          mode)
+    write_stream_header(output_path, shape, dict(keystream_engine=engine, seed_mode=seed_mode, **metadata))
+
+# Fungsi untuk mendekripsi gambar sangat besar per strip baris dengan puncak memori dibatasi memory_budget.
+# Mesin keystream, mode seed dan checkpoint dibaca dari header JSON hasil encrypt_image_streaming.
+def decrypt_image_streaming(encrypted_image_path, output_path, a, b, x0, y0, z0, engine=None, seed_mode=None,
+                            memory_budget=STREAM_MEMORY_BUDGET, mode='RGB'):
+    header = read_stream_header(encrypted_image_path)
+    engine = engine or header.get('keystream_engine', 'legacy')
+    seed_mode = seed_mode or header.get('seed_mode', 'string')
+    checkpoints, interval = None, HENON_CHECKPOINT_INTERVAL
+    if engine == SEEKABLE_ENGINE:
+        checkpoints = unpack_checkpoints(seekable_master_key(a, b, x0, y0, z0), header['henon_checkpoints'])
+        interval = int(header['checkpoint_interval'])
+
+    shape, _ = xor_image_streaming(encrypted_image_path, output_path, a, b, x0, y0, z0, engine, seed_mode,
+                                   memory_budget, mode, checkpoints, interval)
+    # Keluaran terdekripsi adalah gambar biasa: header hanya berisi bentuknya, tanpa metadata cipher
+    write_stream_header(output_path, shape)
@@ -0,0 +1,372 @@
+import os
+import time
+import threading
+import tkinter as tk
+from tkinter import filedialog, messagebox, ttk
+import numpy as np
+from PIL import ImageTk
+
+from . import des, xor
+from .imaging import load_array, open_image
+from .instrument import progress_callback, stage
+from .keystream import KEYSTREAM_ENGINES, SEED_MODES, SEEKABLE_ENGINE
+from .metrics import calculate_metrics, plot_histograms
+
+# Progress bar labels of the loops that report progress
+STAGE_LABELS = {
+    'henon.map': "Hénon map",
+    'henon.keystream': "Keystream",
+    'henon.region': "Region decryption",
+    'logistic.map': "Logistic map",
+    'logistic.permutation': "Permutation",
+    'cipher.encrypt': "DES encryption",
+    'cipher.decrypt': "DES decryption",
+}
+
+# Image preview of a file or of a result held in memory (PIL image or array), no temporary file
+def load_image(image, label):
+    img = open_image(image)
+    if img is image:
+        img = img.copy()  # thumbnail() resizes in place
+    img.thumbnail((200, 200))
+    img_tk = ImageTk.PhotoImage(img)
+    label.config(image=img_tk)
+    label.image = img_tk
+
+# Raised inside the worker thread by the progress callback once Cancel was pressed
+class JobCancelled(Exception):
+    pass
+
+# Runs one encryption/decryption at a time on a worker thread so the Tk mainloop stays responsive.
+# The worker only stores its progress and result; the Tk thread polls them and updates the widgets.
+class JobRunner:
+    def __init__(self, root, buttons):
+        self.root = root
+        self.buttons = buttons
+        self.thread = None
+        self.cancelled = threading.Event()
+        self.progress = None
+        self.outcome = None
+
+        self.bar = ttk.Progressbar(root, length=300, maximum=100)
+        self.status = tk.StringVar(value="Idle")
+        self.cancel_button = tk.Button(root, text="Cancel", command=self.cancel, state=tk.DISABLED)
+
+    def start(self, work, done):
+        # work() runs on the worker thread, done(result) on the Tk thread once it has finished
+        self.cancelled.clear()
+        self.progress, self.outcome = None, None
+        for button in self.buttons:
+            button.config(state=tk.DISABLED)
+        self.cancel_button.config(state=tk.NORMAL)
+        self.bar['value'] = 0
+        self.status.set("Starting...")
+        self.thread = threading.Thread(target=self.run, args=(work,), daemon=True)
+        self.thread.start()
+        self.root.after(100, self.poll, done)
+
+    def cancel(self):
+        self.cancelled.set()
+        self.status.set("Cancelling...")
+
+    def report(self, stage_name, done, total):
+        # Called from the worker's loops; raising here unwinds the job
+        if self.cancelled.is_set():
+            raise JobCancelled
+        self.progress = (stage_name, done, total)
+
+    def run(self, work):
+        try:
+            with progress_callback(self.report):
+                self.outcome = ('done', work())
+        except JobCancelled:
+            self.outcome = ('cancelled', None)
+        except Exception as e:
+            self.outcome = ('error', e)
+
+    def poll(self, done):
+        if self.progress is not None and not self.cancelled.is_set():
+            stage_name, count, total = self.progress
+            percent = 100 * count / total if total else 100
+            self.bar['value'] = percent
+            self.status.set(f"{STAGE_LABELS.get(stage_name, stage_name)}: {percent:.0f}%")
+        if self.thread.is_alive():
+            self.root.after(100, self.poll, done)
+            return
+
+        for button in self.buttons:
+            button.config(state=tk.NORMAL)
+        self.cancel_button.config(state=tk.DISABLED)
+        self.bar['value'] = 0
+        state, result = self.outcome
+        if state == 'cancelled':
+            self.status.set("Cancelled")
+        elif state == 'error':
+            self.status.set("Failed")
+            messagebox.showerror("Error", str(result))
+        else:
+            self.status.set("Idle")
+            try:
+                done(result)
+            except Exception as e:
+                messagebox.showerror("Error", str(e))
+
+# Write through a temporary file so a cancelled or failed job never leaves a partial output behind
+def write_atomically(output_file, write):
+    base, extension = os.path.splitext(output_file)
+    partial_file = base + ".part" + extension  # The extension still selects the image format
+    try:
+        write(partial_file)
+        os.replace(partial_file, output_file)
+    finally:
+        if os.path.exists(partial_file):
+            os.remove(partial_file)
+
+# Hénon XOR UI
+def create_henon_ui():
+    def select_file():
+        file_path = filedialog.askopenfilename(filetypes=[("Image Files", "*.png;*.jpg")])
+        if file_path:
+            entry_file.delete(0, tk.END)
+            entry_file.insert(0, file_path)
+            load_image(file_path, img_preview)
+
+    def encrypt_action():
+        image_path = entry_file.get()
+        a, b = float(entry_a.get()), float(entry_b.get())
+        x0, y0, z0 = float(entry_x0.get()), float(entry_y0.get()), float(entry_z0.get())
+        output_file = "./Ex Image/encrypted_image_henon.png"
+
+        engine, seed_mode = engine_var.get(), seed_mode_var.get()
+
+        # Runs on the worker thread: no widget is touched here
+        def work():
+            start_time = time.time()
+            with stage('ui.henon.encrypt'):
+                encrypted_img = xor.encrypt_image(image_path, a, b, x0, y0, z0, engine, seed_mode, mode='L')
+                write_atomically(output_file, lambda path: xor.save_encrypted_image(encrypted_img, path))
+            end_time = time.time()
+            original_array = load_array(image_path, 'L')
+            encrypted_array = np.asarray(encrypted_img)
+            with stage('ui.henon.metrics'):
+                metrics = calculate_metrics(original_array, encrypted_array)
+            return encrypted_img, original_array, encrypted_array, metrics, end_time - start_time
+
+        def done(result):
+            encrypted_img, original_array, encrypted_array, (npcr, uaci, entropy), elapsed = result
+            load_image(encrypted_img, img_result)
+            log.set(
+                f"Encryption completed in {elapsed:.2f} seconds.\n"
+                f"NPCR: {npcr:.2f}% | UACI: {uaci:.2f}% | Entropy: {entropy:.2f} bits."
+            )
+            plot_histograms(original_array, encrypted_array, master=root)
+
+        jobs.start(work, done)
+
+    def decrypt_action():
+        encrypted_image_path = "./Ex Image/encrypted_image_henon.png"
+        a, b = float(entry_a.get()), float(entry_b.get())
+        x0, y0, z0 = float(entry_x0.get()), float(entry_y0.get()), float(entry_z0.get())
+        original_image_path = entry_file.get()
+
+        def work():
+            start_time = time.time()
+            with stage('ui.henon.decrypt'):
+                decrypted_img = xor.decrypt_image(encrypted_image_path, a, b, x0, y0, z0, mode='L')
+            end_time = time.time()
+            decrypted_array = np.asarray(decrypted_img)
+            original_img = load_array(original_image_path, 'L')
+            accuracy = np.mean(decrypted_array == original_img) * 100
+            return decrypted_img, original_img, decrypted_array, accuracy, end_time - start_time
+
+        def done(result):
+            decrypted_img, original_img, decrypted_array, accuracy, elapsed = result
+            load_image(decrypted_img, img_result)
+            log.set(f"Decryption completed in {elapsed:.2f} seconds.\n"
+                    f"Decryption Accuracy: {accuracy:.2f}%.")
+            plot_histograms(original_img, decrypted_array, master=root)
+
+        jobs.start(work, done)
+
+    # Main UI
+    root = tk.Tk()
+    root.title("Hénon Map Encryption & Decryption")
+
+    # File Selection
+    tk.Label(root, text="Select Image File:").grid(row=0, column=0, padx=5, pady=5)
+    entry_file = tk.Entry(root, width=40)
+    entry_file.grid(row=0, column=1, padx=5, pady=5)
+    tk.Button(root, text="Browse", command=select_file).grid(row=0, column=2, padx=5, pady=5)
+
+    # Parameters
+    tk.Label(root, text="Hénon Map A:").grid(row=1, column=0, padx=5, pady=5)
+    entry_a = tk.Entry(root, width=10)
+    entry_a.insert(0, "1.4")
+    entry_a.grid(row=1, column=1, padx=5, pady=5, sticky="w")
+
+    tk.Label(root, text="Hénon Map B:").grid(row=2, column=0, padx=5, pady=5)
+    entry_b = tk.Entry(root, width=10)
+    entry_b.insert(0, "0.3")
+    entry_b.grid(row=2, column=1, padx=5, pady=5, sticky="w")
+
+    tk.Label(root, text="Initial X0:").grid(row=3, column=0, padx=5, pady=5)
+    entry_x0 = tk.Entry(root, width=10)
+    entry_x0.insert(0, "0.1")
+    entry_x0.grid(row=3, column=1, padx=5, pady=5, sticky="w")
+
+    tk.Label(root, text="Initial Y0:").grid(row=4, column=0, padx=5, pady=5)
+    entry_y0 = tk.Entry(root, width=10)
+    entry_y0.insert(0, "0.2")
+    entry_y0.grid(row=4, column=1, padx=5, pady=5, sticky="w")
+
+    tk.Label(root, text="Initial Z0:").grid(row=5, column=0, padx=5, pady=5)
+    entry_z0 = tk.Entry(root, width=10)
+    entry_z0.insert(0, "0.3")
+    entry_z0.grid(row=5, column=1, padx=5, pady=5, sticky="w")
+
+    # Keystream Engine & Seed Mode
+    tk.Label(root, text="Keystream Engine / Seed Mode:").grid(row=6, column=0, padx=5, pady=5)
+    engine_var = tk.StringVar(value="legacy")
+    tk.OptionMenu(root, engine_var, *KEYSTREAM_ENGINES, SEEKABLE_ENGINE).grid(row=6, column=1, padx=5, pady=5, sticky="w")
+    seed_mode_var = tk.StringVar(value="string")
+    tk.OptionMenu(root, seed_mode_var, *SEED_MODES).grid(row=6, column=2, padx=5, pady=5)
+
+    # Encryption & Decryption, run in the background and cancellable
+    encrypt_button = tk.Button(root, text="Encrypt", command=encrypt_action)
+    encrypt_button.grid(row=7, column=0, padx=5, pady=10)
+    decrypt_button = tk.Button(root, text="Decrypt", command=decrypt_action)
+    decrypt_button.grid(row=7, column=1, padx=5, pady=10)
+    jobs = JobRunner(root, (encrypt_button, decrypt_button))
+    jobs.cancel_button.grid(row=7, column=2, padx=5, pady=10)
+
+    # Image Preview
+    img_preview = tk.Label(root)
+    img_preview.grid(row=8, column=0, columnspan=3, pady=10)
+
+    # Result Image
+    img_result = tk.Label(root)
+    img_result.grid(row=9, column=0, columnspan=3, pady=10)
+
+    # Log Output
+    log = tk.StringVar()
+    tk.Label(root, textvariable=log).grid(row=10, column=0, columnspan=3, pady=10)
+
+    # Progress
+    jobs.bar.grid(row=11, column=0, columnspan=2, padx=5, pady=10)
+    tk.Label(root, textvariable=jobs.status).grid(row=11, column=2, padx=5, pady=10)
+
+    root.mainloop()
+
+# Chaotic DES UI
+def create_des_ui():
+    def select_file():
+        file_path = filedialog.askopenfilename(filetypes=[("Image Files", "*.png;*.jpg")])
+        if file_path:
+            entry_file.delete(0, tk.END)
+            entry_file.insert(0, file_path)
+            load_image(file_path, img_preview)
+
+    def encrypt_action():
+        image_path = entry_file.get()
+        x0 = float(entry_x0.get())
+        des_key = entry_key.get().encode()
+        output_file = "encrypted_image_des.bin"
+
+        if len(des_key) != 8:
+            messagebox.showerror("Error", "DES Key must be 8 bytes!")
+            return
+
+        def work():
+            start_time = time.time()
+            with stage('ui.des.encrypt'):
+                result = []
+                write_atomically(output_file,
+                                 lambda path: result.extend(des.encrypt_image(image_path, x0, des_key, path)))
+                encrypted_img, original_array, encrypted_array = result
+            end_time = time.time()
+            with stage('ui.des.metrics'):
+                metrics = calculate_metrics(original_array, encrypted_array)
+            return encrypted_img, original_array, encrypted_array, metrics, end_time - start_time
+
+        def done(result):
+            encrypted_img, original_array, encrypted_array, (npcr, uaci, entropy), elapsed = result
+            load_image(encrypted_img, img_result)
+            log.set(
+                f"Encryption completed in {elapsed:.2f} seconds.\n"
+                f"NPCR: {npcr:.2f}% | UACI: {uaci:.2f}% | Entropy: {entropy:.2f} bits."
+            )
+            plot_histograms(original_array, encrypted_array, master=root)
+
+        jobs.start(work, done)
+
+    def decrypt_action():
+        input_file = "encrypted_image_des.bin"
+        x0 = float(entry_x0.get())
+        des_key = entry_key.get().encode()
+
+        original_image_path = entry_file.get()
+
+        def work():
+            start_time = time.time()
+            with stage('ui.des.decrypt'):
+                decrypted_img, encrypted_array, decrypted_array = des.decrypt_image(input_file, x0, des_key)
+            end_time = time.time()
+            original_image = load_array(original_image_path, 'L')
+            accuracy = np.mean(decrypted_array == original_image) * 100
+            return decrypted_img, original_image, decrypted_array, accuracy, end_time - start_time
+
+        def done(result):
+            decrypted_img, original_image, decrypted_array, accuracy, elapsed = result
+            load_image(decrypted_img, img_result)
+            log.set(f"Decryption completed in {elapsed:.2f} seconds.\n"
+                    f"Decryption Accuracy: {accuracy:.2f}%.")
+            plot_histograms(original_image, decrypted_array, master=root)
+
+        jobs.start(work, done)
+
+    # Main UI
+    root = tk.Tk()
+    root.title("DES Encryption & Decryption")
+
+    # File Selection
+    tk.Label(root, text="Select Image File:").grid(row=0, column=0, padx=5, pady=5)
+    entry_file = tk.Entry(root, width=40)
+    entry_file.grid(row=0, column=1, padx=5, pady=5)
+    tk.Button(root, text="Browse", command=select_file).grid(row=0, column=2, padx=5, pady=5)
+
+    # Parameters
+    tk.Label(root, text="Logistic Map X0:").grid(row=1, column=0, padx=5, pady=5)
+    entry_x0 = tk.Entry(root, width=10)
+    entry_x0.insert(0, "0.6")
+    entry_x0.grid(row=1, column=1, padx=5, pady=5, sticky="w")
+
+    tk.Label(root, text="DES Key (8 bytes):").grid(row=2, column=0, padx=5, pady=5)
+    entry_key = tk.Entry(root, width=10)
+    entry_key.insert(0, "12345678")
+    entry_key.grid(row=2, column=1, padx=5, pady=5, sticky="w")
+
+    # Encryption & Decryption, run in the background and cancellable
+    encrypt_button = tk.Button(root, text="Encrypt", command=encrypt_action)
+    encrypt_button.grid(row=3, column=0, padx=5, pady=10)
+    decrypt_button = tk.Button(root, text="Decrypt", command=decrypt_action)
+    decrypt_button.grid(row=3, column=1, padx=5, pady=10)
+    jobs = JobRunner(root, (encrypt_button, decrypt_button))
+    jobs.cancel_button.grid(row=3, column=2, padx=5, pady=10)
+
+    # Image Preview
+    img_preview = tk.Label(root)
+    img_preview.grid(row=4, column=0, columnspan=3, pady=10)
+
+    # Result Image
+    img_result = tk.Label(root)
+    img_result.grid(row=5, column=0, columnspan=3, pady=10)
+
+    # Log Output
+    log = tk.StringVar()
+    tk.Label(root, textvariable=log).grid(row=6, column=0, columnspan=3, pady=10)
+
+    # Progress
+    jobs.bar.grid(row=7, column=0, columnspan=2, padx=5, pady=10)
+    tk.Label(root, textvariable=jobs.status).grid(row=7, column=2, padx=5, pady=10)
+
+    root.mainloop()
@@ -0,0 +1,233 @@
+from pathlib import Path
+import numpy as np
+from PIL import PngImagePlugin
+
+from .henon import HENON_BATCH_MIN_KEYS, henon_map_3d_batch_blocks, henon_map_3d_blocks
+from .cache import cached
+from .imaging import array_image, encode_image, is_path, load_array, open_image, save_image
+from .instrument import progress, stage
+from .keystream import (
+    HENON_CHECKPOINT_INTERVAL, KEYSTREAM_ENGINES, SEEKABLE_ENGINE, derive_seed, derive_seed_batch, generate_keystream,
+    generate_seekable_keystream, henon_checkpoints, seekable_keystream, seekable_master_key, seekable_metadata,
+    unpack_checkpoints,
+)
+from .streaming import open_image_array, read_stream_header
+
+# Kunci metadata PNG yang dibutuhkan saat dekripsi
+ENCRYPTION_METADATA_KEYS = ('keystream_engine', 'seed_mode', 'checkpoint_interval', 'henon_checkpoints')
+
+# Metadata PNG gambar terenkripsi: mesin keystream, mode seed dan checkpoint (jika ada)
+def encryption_pnginfo(encrypted_image):
+    metadata = PngImagePlugin.PngInfo()
+    for key in ENCRYPTION_METADATA_KEYS:
+        if key in encrypted_image.info:
+            metadata.add_text(key, encrypted_image.info[key])
+    return metadata
+
+# Menyimpan gambar terenkripsi beserta metadatanya ke path atau objek file biner (PNG)
+def save_encrypted_image(encrypted_image, output_path):
+    save_image(encrypted_image, output_path, pnginfo=encryption_pnginfo(encrypted_image))
+
+# Byte PNG gambar terenkripsi beserta metadatanya, tanpa menulis ke disk
+def encrypted_image_bytes(encrypted_image):
+    return encode_image(encrypted_image, pnginfo=encryption_pnginfo(encrypted_image))
+
+# Keystream satu gambar untuk mesin apa pun; checkpoints dan interval (dari metadata file) hanya dipakai mesin seekable.
+# Dengan cache, keystream yang sudah pernah dihitung untuk kunci dan panjang yang sama dibaca dari memmap di disk.
+def image_keystream(a, b, x0, y0, z0, iterations, engine, seed_mode, workers=1, checkpoints=None, cache=None,
+                    interval=HENON_CHECKPOINT_INTERVAL):
+    def compute():
+        if engine == SEEKABLE_ENGINE:
+            with stage('henon.keystream', iterations):
+                return generate_seekable_keystream(seekable_master_key(a, b, x0, y0, z0), checkpoints, iterations,
+                                                   workers, interval)
+
+        # Menghasilkan urutan pseudo-random menggunakan Hénon Map, blok demi blok
+        blocks = henon_map_3d_blocks(a, b, x0, y0, z0, iterations)
+
+        # Hasil Hénon Map dimasukkan bertahap ke hasher sebagai seed untuk CSPRNG
+        # (tahap 'henon.seed' mencakup Hénon Map yang berjalan bersamaan dengannya)
+        seed_hash, _ = KEYSTREAM_ENGINES[engine]
+        with stage('henon.seed', iterations):
+            seed_hasher = derive_seed(blocks, seed_hash(), seed_mode)
+        with stage('henon.keystream', iterations):
+            return generate_keystream(engine, seed_hasher, iterations, workers)
+
+    version = f'{engine}/{interval}' if engine == SEEKABLE_ENGINE else f'{engine}/{seed_mode}'
+    return cached(cache, 'henon', version, (a, b, x0, y0, z0), iterations, compute)
+
+# XOR gambar dengan keystream di tempat: hasilnya ditulis ke array gambar itu sendiri (milik pemanggil,
+# misalnya hasil load_array), tanpa array baru
+def xor_keystream(image_array, random_sequence):
+    with stage('henon.xor', image_array.nbytes):
+        return np.bitwise_xor(image_array, random_sequence.reshape(image_array.shape), out=image_array)
+
+# Fungsi untuk mengenkripsi gambar dengan Hénon Map dan CSPRNG.
+# image boleh berupa path, objek file, byte gambar (PNG, JPEG, ...), array NumPy atau gambar PIL.
+# mode adalah mode warna PIL: 'RGB' atau 'L' (grayscale); cache adalah KeystreamCache opsional.
+def encrypt_image(image, a, b, x0, y0, z0, engine='legacy', seed_mode='string', workers=1, mode='RGB', cache=None):
+    # Membaca gambar dan mengubahnya ke mode warna yang diminta (langsung ke satu array, strip demi strip)
+    image_array = load_array(image, mode)
+
+    # Menentukan jumlah iterasi yang sesuai
+    iterations = image_array.size  # Jumlah byte piksel (3 kali jumlah piksel untuk RGB)
+
+    metadata = {}
+    checkpoints = None
+    if engine == SEEKABLE_ENGINE:
+        # Mesin seekable: keystream per segmen dari checkpoint Hénon yang ikut disimpan
+        with stage('henon.checkpoints', iterations):
+            checkpoints = cached(cache, 'henon-checkpoints', f'{SEEKABLE_ENGINE}/{HENON_CHECKPOINT_INTERVAL}',
+                                 (a, b, x0, y0, z0), iterations,
+                                 lambda: henon_checkpoints(a, b, x0, y0, z0, iterations))
+        metadata = seekable_metadata(seekable_master_key(a, b, x0, y0, z0), checkpoints)
+    random_sequence = image_keystream(a, b, x0, y0, z0, iterations, engine, seed_mode, workers, checkpoints, cache)
+
+    # Mengenkripsi gambar menggunakan operasi XOR dengan CSPRNG
+    encrypted_image_array = xor_keystream(image_array, random_sequence)
+
+    # Mengubah array kembali ke gambar lewat Image.frombuffer, tanpa salinan perantara
+    encrypted_image = array_image(encrypted_image_array)
+    encrypted_image.info['keystream_engine'] = engine  # Dicatat agar dekripsi memilih mesin yang sama
+    encrypted_image.info['seed_mode'] = seed_mode
+    encrypted_image.info.update(metadata)
+    return encrypted_image
+
+# Fungsi untuk mengenkripsi banyak gambar sekaligus, masing-masing dengan kunci (a, b, x0, y0, z0) sendiri.
+# Batch kecil (di bawah HENON_BATCH_MIN_KEYS) dienkripsi per gambar karena lintasan skalar lebih cepat.
+def encrypt_images(image_paths, keys, engine='legacy', seed_mode='string', mode='RGB'):
+    if engine == SEEKABLE_ENGINE or len(keys) < HENON_BATCH_MIN_KEYS:
+        # Mesin seekable tidak memakai seed bersama, setiap gambar dienkripsi dari checkpoint-nya sendiri
+        return [encrypt_image(image_path, *key, engine, seed_mode, mode=mode)
+                for image_path, key in zip(image_paths, keys)]
+
+    image_arrays = [load_array(image_path, mode) for image_path in image_paths]
+    lengths = [image_array.size for image_array in image_arrays]
+
+    # Semua lintasan Hénon dihitung bersama, satu langkah untuk K gambar per iterasi
+    seed_hash, keystream = KEYSTREAM_ENGINES[engine]
+    blocks = henon_map_3d_batch_blocks(*zip(*keys), max(lengths))
+    with stage('henon.seed', sum(lengths)):
+        seed_hashers = derive_seed_batch(blocks, [seed_hash() for _ in keys], lengths, [seed_mode] * len(keys))
+
+    encrypted_images = []
+    for image_array, seed_hasher in zip(image_arrays, seed_hashers):
+        with stage('henon.keystream', image_array.size):
+            random_sequence = keystream(seed_hasher, image_array.size)
+        encrypted_image = array_image(xor_keystream(image_array, random_sequence))
+        encrypted_image.info['keystream_engine'] = engine
+        encrypted_image.info['seed_mode'] = seed_mode
+        encrypted_images.append(encrypted_image)
+
+    return encrypted_images
+
+# bbox = (kiri, atas, kanan, bawah) harus berupa wilayah tidak kosong di dalam gambar; selain itu ValueError
+def check_bbox(bbox, width, height):
+    left, top, right, bottom = bbox
+    if not (0 <= left < right <= width and 0 <= top < bottom <= height):
+        raise ValueError(f"bbox {tuple(bbox)} tidak valid untuk gambar {width}x{height}: "
+                         "harus 0 <= kiri < kanan <= lebar dan 0 <= atas < bawah <= tinggi")
+    return left, top, right, bottom
+
+# Fungsi untuk mendekripsi gambar dengan Hénon Map dan CSPRNG
+# encrypted_image boleh berupa path, objek file, byte PNG atau gambar PIL (metadata dibaca darinya);
+# bbox = (kiri, atas, kanan, bawah) untuk hanya mendekripsi sebagian gambar
+def decrypt_image(encrypted_image, a, b, x0, y0, z0, engine=None, seed_mode=None, bbox=None, workers=1, mode='RGB',
+                  cache=None):
+    # Membaca gambar terenkripsi
+    encrypted_image = open_image(encrypted_image)
+    # Mesin keystream dan mode seed dibaca dari metadata, file lama tanpa metadata memakai 'legacy'
+    engine = engine or encrypted_image.info.get('keystream_engine', 'legacy')
+    seed_mode = seed_mode or encrypted_image.info.get('seed_mode', 'string')
+    checkpoints = None
+    interval = HENON_CHECKPOINT_INTERVAL
+    if engine == SEEKABLE_ENGINE:
+        if bbox is not None:
+            # Mesin seekable: hanya segmen keystream yang menyentuh bbox yang dihitung
+            return array_image(decrypt_region(encrypted_image, a, b, x0, y0, z0, bbox, mode))
+        # Dekripsi penuh: keystream utuh dihitung oleh workers proses (dan dapat dipakai ulang lewat cache);
+        # interval checkpoint dibaca dari file seperti pada decrypt_region
+        checkpoints = unpack_checkpoints(seekable_master_key(a, b, x0, y0, z0),
+                                         encrypted_image.info['henon_checkpoints'])
+        interval = int(encrypted_image.info['checkpoint_interval'])
+    encrypted_image_array = load_array(encrypted_image, mode)
+
+    # Menentukan jumlah iterasi yang sesuai
+    iterations = encrypted_image_array.size  # Jumlah byte piksel (3 kali jumlah piksel untuk RGB)
+    random_sequence = image_keystream(a, b, x0, y0, z0, iterations, engine, seed_mode, workers, checkpoints, cache,
+                                      interval)
+
+    # Mendekripsi gambar menggunakan operasi XOR dengan CSPRNG
+    decrypted_image_array = xor_keystream(encrypted_image_array, random_sequence)
+
+    # Mengubah array kembali ke gambar; mesin lain tidak dapat diakses acak sehingga bbox dipotong
+    # setelah dekripsi penuh
+    decrypted_image = array_image(decrypted_image_array)
+    if bbox is not None:
+        decrypted_image = decrypted_image.crop(check_bbox(bbox, *decrypted_image.size))
+    return decrypted_image
+
+# Fungsi untuk mendekripsi banyak gambar sekaligus, masing-masing dengan kunci (a, b, x0, y0, z0) sendiri.
+# Gambar mesin seekable didekripsi satu per satu dari checkpoint-nya, sisanya bersama-sama
+# (kecuali jika jumlahnya di bawah HENON_BATCH_MIN_KEYS, lalu juga per gambar).
+def decrypt_images(encrypted_image_paths, keys, mode='RGB'):
+    encrypted_images = [open_image(encrypted_image_path) for encrypted_image_path in encrypted_image_paths]
+    engines = [image.info.get('keystream_engine', 'legacy') for image in encrypted_images]
+    decrypted_images = [None] * len(encrypted_images)
+    batched = [i for i, engine in enumerate(engines) if engine != SEEKABLE_ENGINE]
+    if len(batched) < HENON_BATCH_MIN_KEYS:
+        batched = []
+    for i in sorted(set(range(len(encrypted_images))).difference(batched)):
+        decrypted_images[i] = decrypt_image(encrypted_images[i], *keys[i], mode=mode)
+    if not batched:
+        return decrypted_images
+
+    seed_modes = [encrypted_images[i].info.get('seed_mode', 'string') for i in batched]
+    encrypted_image_arrays = [load_array(encrypted_images[i], mode) for i in batched]
+    lengths = [image_array.size for image_array in encrypted_image_arrays]
+
+    # Semua lintasan Hénon dihitung bersama, satu langkah untuk K gambar per iterasi
+    blocks = henon_map_3d_batch_blocks(*zip(*(keys[i] for i in batched)), max(lengths))
+    with stage('henon.seed', sum(lengths)):
+        seed_hashers = derive_seed_batch(blocks, [KEYSTREAM_ENGINES[engines[i]][0]() for i in batched], lengths,
+                                         seed_modes)
+
+    for i, image_array, seed_hasher in zip(batched, encrypted_image_arrays, seed_hashers):
+        with stage('henon.keystream', image_array.size):
+            random_sequence = KEYSTREAM_ENGINES[engines[i]][1](seed_hasher, image_array.size)
+        decrypted_images[i] = array_image(xor_keystream(image_array, random_sequence))
+
+    return decrypted_images
+
+# Fungsi untuk mendekripsi hanya wilayah bbox = (kiri, atas, kanan, bawah) dari gambar terenkripsi mesin seekable.
+# Biaya sebanding dengan luas wilayah: setiap baris hanya membutuhkan segmen keystream yang disentuhnya.
+# Keluaran streaming (.npy, .raw, TIFF) dibaca dari path, PNG juga dari objek file, byte atau gambar PIL.
+def decrypt_region(encrypted_image, a, b, x0, y0, z0, bbox=None, mode='RGB'):
+    if is_path(encrypted_image) and Path(encrypted_image).suffix.lower() in ('.npy', '.raw', '.tif', '.tiff'):
+        metadata = read_stream_header(encrypted_image)
+    else:
+        # Dibuka sekali lalu dipakai ulang, objek file tidak dapat dibaca dua kali
+        encrypted_image = open_image(encrypted_image)
+        metadata = encrypted_image.info
+    if metadata.get('keystream_engine') != SEEKABLE_ENGINE:
+        raise ValueError("Dekripsi wilayah membutuhkan gambar yang dienkripsi dengan mesin " + SEEKABLE_ENGINE)
+
+    master_key = seekable_master_key(a, b, x0, y0, z0)
+    checkpoints = unpack_checkpoints(master_key, metadata['henon_checkpoints'])
+    interval = int(metadata['checkpoint_interval'])
+
+    encrypted_image_array = open_image_array(encrypted_image, mode)
+    height, width = encrypted_image_array.shape[:2]
+    left, top, right, bottom = check_bbox(bbox, width, height) if bbox is not None else (0, 0, width, height)
+    row_bytes = encrypted_image_array[0].size
+    pixel_bytes = row_bytes // width
+
+    region = np.array(encrypted_image_array[top:bottom, left:right])
+    with stage('henon.region', region.nbytes):
+        for i, row in enumerate(range(top, bottom)):
+            offset = row * row_bytes + left * pixel_bytes
+            random_sequence = seekable_keystream(master_key, checkpoints, interval, offset, region[i].size)
+            np.bitwise_xor(region[i], random_sequence.reshape(region[i].shape), out=region[i])
+            progress('henon.region', i + 1, bottom - top)
+
+    return region
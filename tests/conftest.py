@@ -0,0 +1,19 @@
+import tracemalloc
+
+import pytest
+
+from chaoscrypt import instrument
+
+@pytest.fixture
+def traced():
+    """
+    Stage metrics with memory tracing for the duration of a test, started from an empty snapshot.
+    """
+    tracing = tracemalloc.is_tracing()
+    instrument.reset()
+    instrument.enable(trace_memory=True)
+    yield
+    instrument.disable()
+    instrument.reset()
+    if not tracing:
+        tracemalloc.stop()
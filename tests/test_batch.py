@@ -0,0 +1,38 @@
+import os
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from chaoscrypt.batch import output_name, output_paths, pattern_root, run_batch
+
+def test_output_names_keep_extension_and_subdirectory():
+    assert output_name('in/x.png', 'des', 'encrypt', 'in') == 'x.png.bin'
+    assert output_name('in/x.png.bin', 'des', 'decrypt', 'in') == 'x.png'
+    assert output_name('in/x.jpg', 'henon', 'encrypt', 'in') == 'x.jpg.png'
+    assert output_name('in/a/x.png', 'henon', 'encrypt', 'in') == os.path.join('a', 'x.png')
+
+def test_pattern_root():
+    assert pattern_root('in/**/*.png') == 'in'
+    assert pattern_root('*.png') == '.'
+    assert pattern_root('in/x.png') == 'in'
+
+def test_colliding_outputs_are_rejected():
+    with pytest.raises(ValueError, match='same output'):
+        output_paths(['in/x', 'in/x.png'], 'in/*', 'henon', 'encrypt', 'out')
+
+def test_same_stem_in_one_directory_and_subdirectories(tmp_path):
+    image = Image.fromarray(np.arange(64, dtype=np.uint8).reshape(8, 8))
+    inputs = tmp_path / 'in'
+    (inputs / 'sub').mkdir(parents=True)
+    for path in ('x.png', 'x.bmp', 'sub/x.png'):
+        image.save(inputs / path)
+
+    params = {'a': 1.4, 'b': 0.3, 'x0': 0.6, 'y0': 0.2, 'z0': 0.3, 'engine': 'legacy', 'seed_mode': 'string',
+              'des_key': b'12345678'}
+    output_dir = tmp_path / 'out'
+    processed, failures = run_batch('des', 'encrypt', 'gray', str(inputs / '**' / 'x.*'), str(output_dir), params,
+                                    workers=1)
+    assert (processed, failures) == (3, 0)
+    assert sorted(str(p.relative_to(output_dir)) for p in output_dir.rglob('*.bin')) == [
+        'sub/x.png.bin', 'x.bmp.bin', 'x.png.bin']
@@ -0,0 +1,83 @@
+import io
+
+import numpy as np
+import pytest
+from Crypto.Cipher import AES, DES
+
+from chaoscrypt.ciphers import (
+    CIPHER_BACKENDS, FILE_SALT_SIZE, decrypt_buffer, derive_key, decrypt_stream, encrypt_stream, new_nonce,
+)
+from chaoscrypt.instrument import progress_callback
+
+KEY = b'12345678'
+DATA = np.random.default_rng(0).integers(0, 256, 3 * 65536 + 123, dtype=np.uint8)
+
+def encrypt(backend, nonce, data=DATA, offset=0):
+    output = io.BytesIO()
+    encrypt_stream(data, KEY, output, backend, nonce, offset)
+    return output.getvalue()
+
+@pytest.mark.parametrize('backend', list(CIPHER_BACKENDS))
+@pytest.mark.parametrize('threads', [1, 3])
+def test_roundtrip(backend, threads):
+    nonce = new_nonce(backend)
+    output = io.BytesIO()
+    encrypt_stream(DATA, KEY, output, backend, nonce, threads=threads, chunk_size=100000)
+    ciphertext = output.getvalue()
+    assert np.array_equal(decrypt_buffer(ciphertext, KEY, backend, nonce, threads=threads), DATA)
+    assert np.array_equal(decrypt_stream(io.BytesIO(ciphertext), len(ciphertext), KEY, backend, nonce), DATA)
+
+def test_des_ctr_files_get_a_salt_and_a_per_file_key():
+    assert len(new_nonce('des-ctr')) == FILE_SALT_SIZE
+    # Same first 4 salt bytes (the counter block nonce): only the subkey keeps the keystreams apart
+    zeros = np.zeros(4096, dtype=np.uint8)
+    first = encrypt('des-ctr', b'\0' * 4 + b'A' * 12, zeros)
+    second = encrypt('des-ctr', b'\0' * 4 + b'B' * 12, zeros)
+    assert first != second
+
+def test_des_ctr_legacy_nonce_still_decrypts():
+    nonce = b'\x01\x02\x03\x04'
+    ciphertext = DES.new(KEY, DES.MODE_CTR, nonce=nonce, initial_value=0).encrypt(DATA.tobytes())
+    assert np.array_equal(decrypt_buffer(ciphertext, KEY, 'des-ctr', nonce), DATA)
+
+def test_aes_gcm_files_get_a_salt_and_a_per_file_key():
+    assert len(new_nonce('aes-gcm')) == FILE_SALT_SIZE
+    zeros = np.zeros(4096, dtype=np.uint8)
+    first = encrypt('aes-gcm', b'\0' * 4 + b'A' * 12, zeros)
+    second = encrypt('aes-gcm', b'\0' * 4 + b'B' * 12, zeros)
+    assert first[:4096] != second[:4096]
+
+def test_aes_gcm_legacy_nonce_still_decrypts():
+    nonce = b'\x01\x02\x03\x04'
+    cipher = AES.new(derive_key(KEY, 32), AES.MODE_GCM, nonce=nonce + bytes(7) + b'\x01')
+    ciphertext, tag = cipher.encrypt_and_digest(DATA[:1000].tobytes())
+    assert np.array_equal(decrypt_buffer(ciphertext + tag, KEY, 'aes-gcm', nonce), DATA[:1000])
+
+def test_aes_gcm_detects_tampering():
+    nonce = new_nonce('aes-gcm')
+    ciphertext = bytearray(encrypt('aes-gcm', nonce))
+    ciphertext[10] ^= 1
+    with pytest.raises(ValueError):
+        decrypt_buffer(bytes(ciphertext), KEY, 'aes-gcm', nonce)
+
+@pytest.mark.parametrize('backend', list(CIPHER_BACKENDS))
+def test_decrypt_buffer_reports_progress_per_chunk(backend):
+    nonce = new_nonce(backend)
+    ciphertext = encrypt(backend, nonce)
+    reports = []
+    with progress_callback(lambda stage, done, total: reports.append((stage, done, total))):
+        decrypted = decrypt_buffer(ciphertext, KEY, backend, nonce, chunk_size=65536)
+    assert np.array_equal(decrypted, DATA)
+    assert len(reports) > 1
+    assert all(stage == 'cipher.decrypt' for stage, _, _ in reports)
+    assert reports[-1][1] == reports[-1][2]
+
+def test_decrypt_buffer_is_cancelled_from_the_progress_callback():
+    nonce = new_nonce('des-ecb')
+    ciphertext = encrypt('des-ecb', nonce)
+
+    def cancel(stage, done, total):
+        raise KeyboardInterrupt
+
+    with progress_callback(cancel), pytest.raises(KeyboardInterrupt):
+        decrypt_buffer(ciphertext, KEY, 'des-ecb', nonce, chunk_size=65536)
@@ -0,0 +1,22 @@
+import pytest
+
+from chaoscrypt.cli import build_parser
+from chaoscrypt.keystream import KEYSTREAM_ENGINES, SEEKABLE_ENGINE
+
+@pytest.mark.parametrize('argv', [
+    ['encrypt', 'in.png', 'out.png', '--engine', 'bogus'],
+    ['encrypt', 'in.png', 'out.bin', '--scheme', 'des', '--threads', '0'],
+    ['decrypt', 'in.png', 'out.png', '--workers', '-1'],
+    ['batch', 'encrypt', 'in', '-o', 'out', '--workers', '0'],
+    ['bench', '--engine', SEEKABLE_ENGINE],
+    ['bench-ciphers', '--threads', '0'],
+])
+def test_bad_options_are_rejected_at_parse_time(argv, capsys):
+    with pytest.raises(SystemExit) as exit_info:
+        build_parser().parse_args(argv)
+    assert exit_info.value.code == 2
+    assert 'error: argument' in capsys.readouterr().err
+
+@pytest.mark.parametrize('engine', [*KEYSTREAM_ENGINES, SEEKABLE_ENGINE])
+def test_every_registered_engine_is_accepted(engine):
+    assert build_parser().parse_args(['encrypt', 'in.png', 'out.png', '--engine', engine]).engine == engine
@@ -0,0 +1,44 @@
+import io
+import json
+
+import numpy as np
+import pytest
+
+from chaoscrypt.container import CONTAINER_MAGIC, CONTAINER_VERSION, read_container_header
+from chaoscrypt.des import decrypt_pixels, encrypt_bytes
+
+KEY = b'12345678'
+IMAGE = np.random.default_rng(0).integers(0, 256, (16, 16, 3), dtype=np.uint8)
+
+def container(cipher='des-ecb'):
+    return encrypt_bytes(IMAGE, 0.6, KEY, cipher=cipher, container=True)
+
+def rewrite_header(data, change):
+    start = len(CONTAINER_MAGIC) + 2
+    length = int.from_bytes(data[start:start + 4], 'big')
+    header = json.loads(data[start + 4:start + 4 + length])
+    change(header)
+    encoded = json.dumps(header).encode()
+    return (CONTAINER_MAGIC + CONTAINER_VERSION.to_bytes(2, 'big') + len(encoded).to_bytes(4, 'big') + encoded
+            + data[start + 4 + length:])
+
+@pytest.mark.parametrize('cipher', ['des-ecb', 'aes-gcm'])
+def test_roundtrip(cipher):
+    assert np.array_equal(decrypt_pixels(container(cipher), 0.6, KEY, 3), IMAGE)
+
+@pytest.mark.parametrize('change', [
+    lambda header: header.update(shape=[200000, 200000, 3]),
+    lambda header: header.update(shape=[16, 16]),
+    lambda header: header.update(shape=[16, 16, 4]),
+    lambda header: header.update(channels=1, channel_index=header['channel_index'][:1]),
+    lambda header: header['channel_index'][1].update(length=header['channel_index'][1]['length'] - 8),
+    lambda header: header['channel_index'][2].update(offset=0),
+    lambda header: header['channel_index'][0]['chunks'][0].__setitem__(2, 8),
+    lambda header: header.update(chunk_size=1),
+    lambda header: header.update(cipher='aes-ctr'),
+])
+def test_forged_headers_are_rejected_before_decryption(change):
+    with pytest.raises(ValueError):
+        read_container_header(io.BytesIO(rewrite_header(container(), change)))
+    with pytest.raises(ValueError):
+        decrypt_pixels(rewrite_header(container(), change), 0.6, KEY, 3)
@@ -0,0 +1,23 @@
+import numpy as np
+
+from chaoscrypt import des, instrument
+from chaoscrypt.ciphers import CIPHER_CHUNK_SIZE
+from chaoscrypt.imaging import load_array
+
+KEY = b'12345678'
+
+def test_rgb_decryption_memory_peak(tmp_path, traced):
+    image = np.random.default_rng(0).integers(0, 256, (1024, 512, 3), dtype=np.uint8)
+    encrypted = tmp_path / 'x.bin'
+    encrypted.write_bytes(des.encrypt_bytes(image, 0.5, KEY))
+    instrument.reset()
+
+    output = tmp_path / 'x.png'
+    des.image_decryption_rgb(str(encrypted), 0.5, KEY, str(output))
+    assert np.array_equal(load_array(str(output)), image)
+
+    # Decrypting allocates the output, one channel plane and one cipher chunk at a time, nothing image-sized
+    # besides (the permutations are key schedule and are recorded by des.permutation)
+    stages = instrument.snapshot()
+    plane = image.shape[0] * image.shape[1]
+    assert stages['des.decrypt']['peak_bytes'] <= image.nbytes + plane + CIPHER_CHUNK_SIZE + (1 << 17)
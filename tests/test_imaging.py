@@ -0,0 +1,57 @@
+import io
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from chaoscrypt.imaging import DECODE_STRIP_SIZE, array_image, load_array, open_image
+
+@pytest.mark.parametrize('shape', [(4, 5), (4, 5, 1), (4, 5, 2), (4, 5, 3), (4, 5, 4)])
+def test_uint8_arrays_roundtrip(shape):
+    array = np.arange(np.prod(shape), dtype=np.uint8).reshape(shape)
+    assert np.array_equal(load_array(array), array.reshape(4, 5) if shape == (4, 5, 1) else array)
+
+@pytest.mark.parametrize('array', [
+    np.zeros((4, 5, 3)),
+    np.zeros((4, 5), dtype=np.uint16),
+    np.zeros((4, 5, 3), dtype=bool),
+])
+def test_other_dtypes_are_rejected(array):
+    with pytest.raises(ValueError, match='uint8'):
+        open_image(array)
+
+@pytest.mark.parametrize('shape', [(20,), (4, 5, 5), (4, 5, 3, 1)])
+def test_other_shapes_are_rejected(shape):
+    with pytest.raises(ValueError, match='H, W'):
+        array_image(np.zeros(shape, dtype=np.uint8))
+
+def resident_bytes(field):
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith(field + ':'):
+                return int(line.split()[1]) * 1024
+
+@pytest.mark.parametrize('mode', [None, 'L'])
+def test_decode_resident_peak(mode):
+    # tracemalloc cannot see PIL's own buffers, so the peak resident set size is measured instead (Linux)
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')  # Resets VmHWM, the peak resident set size
+    except OSError:
+        pytest.skip("the peak resident set size cannot be reset here")
+
+    image = np.random.default_rng(0).integers(0, 256, (2048, 2048, 3), dtype=np.uint8)
+    encoded = io.BytesIO()
+    Image.fromarray(image).save(encoded, 'PNG', compress_level=1)
+    data = encoded.getvalue()
+    del image, encoded
+
+    with open('/proc/self/clear_refs', 'w') as f:
+        f.write('5')
+    base = resident_bytes('VmRSS')
+    array = load_array(data, mode)
+    peak = resident_bytes('VmHWM') - base
+
+    # PIL's decoded RGB image (4 bytes per pixel), the output array and a few strips, nothing more
+    pil_image = 2048 * 2048 * 4
+    assert peak <= pil_image + array.nbytes + 3 * DECODE_STRIP_SIZE + (1 << 20)
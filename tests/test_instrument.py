@@ -0,0 +1,101 @@
+import io
+import json
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from chaoscrypt import instrument, xor
+
+KEY = (1.4, 0.3, 0.1, 0.2, 0.3)
+
+def png_bytes(array):
+    output = io.BytesIO()
+    Image.fromarray(array).save(output, 'PNG')
+    return output.getvalue()
+
+def test_xor_runs_in_place(traced):
+    image = np.random.default_rng(1).integers(0, 256, (128, 128, 3), dtype=np.uint8)
+    encrypted = xor.encrypt_image(png_bytes(image), *KEY)
+    assert np.array_equal(np.asarray(xor.decrypt_image(xor.encrypted_image_bytes(encrypted), *KEY)), image)
+
+    # The keystream is XORed into the decoded array itself, the stage allocates nothing image-sized
+    stages = instrument.snapshot()
+    assert stages['henon.xor']['calls'] == 2
+    assert stages['henon.xor']['peak_bytes'] < 4096
+    assert stages['henon.keystream']['peak_bytes'] <= image.nbytes + 4096
+
+@pytest.fixture
+def enabled():
+    instrument.reset()
+    instrument.enable()
+    yield
+    instrument.disable()
+    instrument.reset()
+
+def test_nothing_is_recorded_while_disabled():
+    instrument.reset()
+    calls = []
+    callback = lambda *args: calls.append(args)
+    instrument.add_callback(callback)
+    try:
+        assert not instrument.is_enabled()
+        with instrument.stage('test.stage', 10) as timed:
+            timed.nbytes = 20
+        assert instrument.stage('test.stage') is instrument.stage('other.stage')  # The shared no-op
+        instrument.record('test.stage', 1.0, 10)
+    finally:
+        instrument.remove_callback(callback)
+    assert instrument.snapshot() == {}
+    assert calls == []
+
+def test_stages_and_callbacks(enabled):
+    calls = []
+    callback = lambda *args: calls.append(args)
+    instrument.add_callback(callback)
+    try:
+        with instrument.stage('test.stage', 10):
+            pass
+        with instrument.stage('test.stage') as timed:
+            timed.nbytes = 5
+        instrument.record('test.other', 0.25, 7)
+    finally:
+        instrument.remove_callback(callback)
+
+    stages = instrument.snapshot()
+    assert stages['test.stage']['calls'] == 2 and stages['test.stage']['bytes'] == 15
+    assert stages['test.other'] == {'calls': 1, 'seconds': 0.25, 'bytes': 7, 'peak_bytes': None}
+    assert [(name, nbytes, peak) for name, _, nbytes, peak in calls] == [
+        ('test.stage', 10, None), ('test.stage', 5, None), ('test.other', 7, None)]
+
+def test_json_and_prometheus_export(enabled, tmp_path):
+    instrument.record('henon.xor', 0.5, 1024, 2048)
+    instrument.record('henon.xor', 0.25, 1024, 512)
+    instrument.record('image.decode', 0.125, 300)
+
+    assert json.loads(instrument.to_json()) == {'stages': {
+        'henon.xor': {'calls': 2, 'seconds': 0.75, 'bytes': 2048, 'peak_bytes': 2048},
+        'image.decode': {'calls': 1, 'seconds': 0.125, 'bytes': 300, 'peak_bytes': None},
+    }}
+    assert instrument.to_prometheus() == '\n'.join([
+        '# HELP chaoscrypt_stage_calls_total Runs of the stage.',
+        '# TYPE chaoscrypt_stage_calls_total counter',
+        'chaoscrypt_stage_calls_total{stage="henon.xor"} 2',
+        'chaoscrypt_stage_calls_total{stage="image.decode"} 1',
+        '# HELP chaoscrypt_stage_seconds_total Seconds spent in the stage.',
+        '# TYPE chaoscrypt_stage_seconds_total counter',
+        'chaoscrypt_stage_seconds_total{stage="henon.xor"} 0.75',
+        'chaoscrypt_stage_seconds_total{stage="image.decode"} 0.125',
+        '# HELP chaoscrypt_stage_bytes_total Bytes processed by the stage.',
+        '# TYPE chaoscrypt_stage_bytes_total counter',
+        'chaoscrypt_stage_bytes_total{stage="henon.xor"} 2048',
+        'chaoscrypt_stage_bytes_total{stage="image.decode"} 300',
+        '# HELP chaoscrypt_stage_peak_bytes Highest traced memory above the level at stage entry.',
+        '# TYPE chaoscrypt_stage_peak_bytes gauge',
+        'chaoscrypt_stage_peak_bytes{stage="henon.xor"} 2048',
+    ]) + '\n'
+
+    instrument.write_metrics(tmp_path / 'metrics.json')
+    instrument.write_metrics(tmp_path / 'metrics.prom')
+    assert (tmp_path / 'metrics.json').read_text() == instrument.to_json()
+    assert (tmp_path / 'metrics.prom').read_text() == instrument.to_prometheus()
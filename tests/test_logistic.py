@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+
+from chaoscrypt.instrument import PROGRESS_BLOCK_SIZE
+from chaoscrypt.logistic import (
+    LOGISTIC_BLOCK_SIZE, LOGISTIC_VECTOR_MIN_KEYS, argsort_sequence, logistic_map, logistic_map_batch,
+)
+
+def original_logistic_map(length, x0, r=3.99):
+    # Frozen copy from the original "CSPRNG Chaotic DES" scripts, must not be edited
+    x = x0
+    sequence = []
+    for _ in range(length):
+        x = r * x * (1 - x)
+        sequence.append(x)
+    return np.array(sequence)
+
+@pytest.mark.parametrize('length', [0, 1, 2, 1000, PROGRESS_BLOCK_SIZE + 3])
+@pytest.mark.parametrize('x0', [0.6, 0.61, 0.123456789])
+def test_logistic_map_matches_original(length, x0):
+    assert logistic_map(length, x0).tobytes() == original_logistic_map(length, x0).tobytes()
+
+@pytest.mark.parametrize('keys', [1, 3, LOGISTIC_VECTOR_MIN_KEYS - 1, LOGISTIC_VECTOR_MIN_KEYS, 20])
+@pytest.mark.parametrize('length', [0, 1, 7, LOGISTIC_BLOCK_SIZE + 5])
+def test_logistic_map_batch_matches_original(keys, length):
+    x0s = [0.6 + k * 0.01 for k in range(keys)]
+    sequences = logistic_map_batch(length, x0s)
+    assert sequences.shape == (keys, length)
+    for x0, sequence in zip(x0s, sequences):
+        assert sequence.tobytes() == original_logistic_map(length, x0).tobytes()
+
+def check_argsort(sequence):
+    indices = argsort_sequence(sequence)
+    assert np.array_equal(indices, np.argsort(sequence, kind='stable'))
+    assert indices.dtype == np.int32
+    return indices
+
+@pytest.mark.parametrize('length', [0, 1, 2, 1000, 65537])
+def test_argsort_matches_stable_argsort(length):
+    check_argsort(logistic_map(length, 0.6))
+
+def test_colliding_truncated_keys():
+    # Values that differ only in the low mantissa bits the index replaces form runs of colliding keys
+    rng = np.random.default_rng(0)
+    base = rng.random(50)
+    sequence = (base[rng.integers(0, 50, 5000)].view(np.uint64) + rng.integers(1, 1 << 12, 5000, dtype=np.uint64))
+    check_argsort(sequence.view(np.float64))
+
+@pytest.mark.parametrize('sequence', [
+    np.zeros(1000),
+    np.random.default_rng(1).integers(0, 5, 100000).astype(np.float64),
+    np.concatenate([logistic_map(3000, 0.6)] * 3),
+])
+def test_ties_keep_index_order(sequence):
+    check_argsort(sequence)
+
+@pytest.mark.parametrize('sequence', [
+    np.array([0.5, -0.25, 0.75, -0.0, 0.0]),
+    np.array([0.5, np.nan, 0.25, np.nan, 0.1]),
+    np.array([np.inf, 0.5, -np.inf, 0.5]),
+])
+def test_negative_and_non_finite_values_fall_back(sequence):
+    check_argsort(sequence)
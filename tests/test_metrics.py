@@ -0,0 +1,18 @@
+import numpy as np
+import pytest
+
+from chaoscrypt.metrics import calculate_metrics
+
+def test_known_values():
+    original = np.zeros((16, 16), dtype=np.uint8)
+    encrypted = np.arange(256, dtype=np.uint8).reshape(16, 16)
+    npcr, uaci, entropy = calculate_metrics(original, encrypted)
+    assert npcr == pytest.approx(255 / 256 * 100)
+    assert uaci == pytest.approx(np.mean(np.arange(256)) / 255 * 100)
+    assert entropy == pytest.approx(8.0)
+
+def test_identical_images():
+    image = np.full((4, 4, 3), 9, dtype=np.uint8)
+    npcr, uaci, entropy = calculate_metrics(image, image)
+    assert (npcr, uaci) == (0, 0)
+    assert entropy == pytest.approx(0.0, abs=1e-9)
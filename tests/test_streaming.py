@@ -0,0 +1,21 @@
+import numpy as np
+import pytest
+
+from chaoscrypt.keystream import SEEKABLE_ENGINE
+from chaoscrypt.streaming import decrypt_image_streaming, encrypt_image_streaming, read_stream_header
+
+KEY = (1.4, 0.3, 0.1, 0.2, 0.3)
+
+@pytest.mark.parametrize('engine', ['sha256-ctr', SEEKABLE_ENGINE])
+def test_roundtrip_and_plain_decrypted_header(tmp_path, engine):
+    image = np.random.default_rng(0).integers(0, 256, (37, 20, 3), dtype=np.uint8)
+    np.save(tmp_path / 'in.npy', image)
+    encrypted, decrypted = tmp_path / 'enc.npy', tmp_path / 'dec.raw'
+
+    # A small budget so the image is processed in several strips
+    encrypt_image_streaming(str(tmp_path / 'in.npy'), str(encrypted), *KEY, engine, memory_budget=1000)
+    assert read_stream_header(encrypted)['keystream_engine'] == engine
+    decrypt_image_streaming(str(encrypted), str(decrypted), *KEY, memory_budget=1000)
+
+    assert read_stream_header(decrypted) == {'shape': list(image.shape), 'dtype': 'uint8'}
+    assert np.fromfile(decrypted, dtype=np.uint8).reshape(image.shape).tobytes() == image.tobytes()
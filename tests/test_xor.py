@@ -0,0 +1,135 @@
+import io
+
+import numpy as np
+import pytest
+
+from chaoscrypt import instrument, xor
+from chaoscrypt.cache import KeystreamCache
+from chaoscrypt.henon import HENON_BATCH_MIN_KEYS
+from chaoscrypt.instrument import PROGRESS_BLOCK_SIZE, progress_callback
+from chaoscrypt.keystream import (
+    KEYSTREAM_ENGINES, SEEKABLE_ENGINE, generate_keystream, generate_seekable_keystream, henon_checkpoints,
+    seekable_keystream, seekable_master_key, seekable_metadata,
+)
+
+KEYS = [(1.4, 0.3, 0.1, 0.2, 0.3), (1.4, 0.3, 0.15, 0.2, 0.3)]
+
+def png_bytes(image):
+    output = io.BytesIO()
+    xor.save_encrypted_image(image, output)
+    return output.getvalue()
+
+def test_batch_roundtrip_with_seekable_and_legacy_files():
+    rng = np.random.default_rng(0)
+    images = [rng.integers(0, 256, (12, 10, 3), dtype=np.uint8) for _ in KEYS]
+    seekable = xor.encrypt_images(images, KEYS, engine=SEEKABLE_ENGINE)
+    legacy = xor.encrypt_images(images, KEYS)
+    files = [png_bytes(seekable[0]), png_bytes(legacy[1])]
+
+    decrypted = xor.decrypt_images(files, KEYS)
+    for image, decrypted_image in zip(images, decrypted):
+        assert np.array_equal(np.asarray(decrypted_image), image)
+
+def test_cached_seekable_decrypt_uses_the_file_interval(tmp_path):
+    key, interval = KEYS[0], 64
+    image = np.random.default_rng(1).integers(0, 256, (20, 20, 3), dtype=np.uint8)
+    master_key = seekable_master_key(*key)
+    checkpoints = henon_checkpoints(*key, image.size, interval)
+    keystream = seekable_keystream(master_key, checkpoints, interval, 0, image.size).reshape(image.shape)
+
+    encrypted = xor.array_image(image ^ keystream)
+    encrypted.info.update(seekable_metadata(master_key, checkpoints), checkpoint_interval=str(interval),
+                          keystream_engine=SEEKABLE_ENGINE, seed_mode='string')
+    cache = KeystreamCache(str(tmp_path))
+    decrypted = xor.decrypt_image(png_bytes(encrypted), *key, cache=cache)
+    assert np.array_equal(np.asarray(decrypted), image)
+
+def test_batched_path_matches_single_images():
+    keys = [(1.4, 0.3, 0.1 + 0.001 * k, 0.2, 0.3) for k in range(HENON_BATCH_MIN_KEYS)]
+    rng = np.random.default_rng(2)
+    images = [rng.integers(0, 256, (4, 3 + k % 3, 3), dtype=np.uint8) for k in range(len(keys))]
+    encrypted = xor.encrypt_images(images, keys, seed_mode='binary')
+    for image, key, encrypted_image in zip(images, keys, encrypted):
+        expected = xor.encrypt_image(image, *key, seed_mode='binary')
+        assert np.array_equal(np.asarray(encrypted_image), np.asarray(expected))
+
+    decrypted = xor.decrypt_images([png_bytes(image) for image in encrypted], keys)
+    for image, decrypted_image in zip(images, decrypted):
+        assert np.array_equal(np.asarray(decrypted_image), image)
+
+@pytest.mark.parametrize('bbox', [(-1, 0, 5, 5), (0, -2, 5, 5), (5, 0, 2, 5), (0, 5, 5, 2), (3, 3, 3, 5),
+                                  (0, 0, 11, 5), (0, 0, 5, 13)])
+@pytest.mark.parametrize('engine', ['sha256-ctr', SEEKABLE_ENGINE])
+def test_bad_bbox_is_rejected(bbox, engine):
+    image = np.zeros((12, 10, 3), dtype=np.uint8)
+    encrypted = png_bytes(xor.encrypt_image(image, *KEYS[0], engine))
+    with pytest.raises(ValueError, match='bbox'):
+        xor.decrypt_image(encrypted, *KEYS[0], bbox=bbox)
+
+def test_region_matches_full_decrypt():
+    image = np.random.default_rng(3).integers(0, 256, (12, 10, 3), dtype=np.uint8)
+    encrypted = png_bytes(xor.encrypt_image(image, *KEYS[0], SEEKABLE_ENGINE))
+    assert np.array_equal(xor.decrypt_region(encrypted, *KEYS[0], (2, 3, 10, 12)), image[3:12, 2:10])
+
+def test_full_seekable_decrypt_uses_the_parallel_generator():
+    image = np.random.default_rng(4).integers(0, 256, (40, 30, 3), dtype=np.uint8)
+    encrypted = png_bytes(xor.encrypt_image(image, *KEYS[0], SEEKABLE_ENGINE))
+    instrument.reset()
+    instrument.enable()
+    try:
+        decrypted = xor.decrypt_image(encrypted, *KEYS[0], workers=2)
+        stages = instrument.snapshot()
+    finally:
+        instrument.disable()
+        instrument.reset()
+    assert np.array_equal(np.asarray(decrypted), image)
+    assert 'henon.keystream' in stages and 'henon.region' not in stages
+
+def seed_hasher(engine):
+    hasher = KEYSTREAM_ENGINES[engine][0]()
+    hasher.update(b'seed')
+    return hasher
+
+def keystream_reports(engine, length, workers=1):
+    reports = []
+    with progress_callback(lambda stage, done, total: reports.append((stage, done, total))):
+        if engine == SEEKABLE_ENGINE:
+            checkpoints = henon_checkpoints(*KEYS[0], length)
+            reports.clear()
+            random_sequence = generate_seekable_keystream(seekable_master_key(*KEYS[0]), checkpoints, length, workers)
+        else:
+            random_sequence = generate_keystream(engine, seed_hasher(engine), length, workers)
+    assert random_sequence.size == length
+    return reports
+
+@pytest.mark.parametrize('engine', [*KEYSTREAM_ENGINES, SEEKABLE_ENGINE])
+def test_every_engine_reports_keystream_progress_per_block(engine):
+    length = 3 * PROGRESS_BLOCK_SIZE + 100
+    reports = keystream_reports(engine, length)
+    assert len(reports) >= 4
+    assert all(stage == 'henon.keystream' and total == length for stage, _, total in reports)
+    assert [done for _, done, _ in reports] == sorted(done for _, done, _ in reports)
+    assert reports[-1][1] == length
+
+@pytest.mark.parametrize('engine', ['sha256-ctr', SEEKABLE_ENGINE])
+def test_parallel_keystream_reports_progress_per_range(engine):
+    length = 2 * PROGRESS_BLOCK_SIZE
+    reports = keystream_reports(engine, length, workers=2)
+    assert len(reports) > 1 and reports[-1][1:] == (length, length)
+
+@pytest.mark.parametrize('engine', ['sha256-ctr', 'blake2b-ctr', 'shake256'])
+def test_keystream_is_cancelled_from_the_progress_callback(engine):
+    def cancel(stage, done, total):
+        raise KeyboardInterrupt
+
+    with progress_callback(cancel), pytest.raises(KeyboardInterrupt):
+        generate_keystream(engine, seed_hasher(engine), 2 * PROGRESS_BLOCK_SIZE)
+
+def test_region_reports_progress_per_row():
+    image = np.random.default_rng(5).integers(0, 256, (12, 10, 3), dtype=np.uint8)
+    encrypted = png_bytes(xor.encrypt_image(image, *KEYS[0], SEEKABLE_ENGINE))
+    reports = []
+    with progress_callback(lambda stage, done, total: reports.append((stage, done, total))):
+        xor.decrypt_region(encrypted, *KEYS[0], (2, 3, 10, 12))
+    rows = [report for report in reports if report[0] == 'henon.region']
+    assert rows == [('henon.region', i, 9) for i in range(1, 10)]